@@ -26,7 +26,7 @@ class RepositorySnapshotSchema(BaseSchema):
     stars: int = Field(alias='stargazers_count')
     forks: int = Field(alias='forks_count')
     subscribers_count: int
-    open_issues: int = Field(alias='has_issues')
+    open_issues: int = Field(alias='open_issues_count')
     size_kb: int = Field(alias='size')
     pushed_at: datetime
 
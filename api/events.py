@@ -0,0 +1,127 @@
+import fcntl
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger('pipeline.events')
+
+# events whose payload carries the repository with fresh counters
+EVENT_TYPES = {'watch', 'fork', 'issues', 'push', 'repository'}
+
+# repository fields that push events send as epoch seconds instead of ISO strings
+TIMESTAMP_FIELDS = ('created_at', 'updated_at', 'pushed_at')
+
+
+def spool_line(event: str, payload: dict) -> str:
+    """One line of the event spool, as written by service/webhook.py."""
+    return json.dumps({
+        'event': event,
+        'received_at': datetime.now(timezone.utc).isoformat(),
+        'payload': payload,
+    }) + '\n'
+
+
+def is_current(f, path) -> bool:
+    """Whether the open file ``f`` is still the one at ``path``."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def append_to_spool(path: str, line: str):
+    """Append one line to the live spool under an exclusive flock.
+
+    claim_spool renames the spool while holding the same lock, so a writer
+    that opened the file before the rename notices it after getting the
+    lock and writes to the new spool instead of the claimed one.
+    """
+    while True:
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            if is_current(f, path):
+                f.write(line)
+                f.flush()
+                return
+
+
+def claim_spool(path: str) -> List[Path]:
+    """Move the live spool aside and return every claimed file, oldest first.
+
+    The rename happens under the writers' flock, so once it returns no
+    delivery is still being written to a claimed file. Files left over from
+    an interrupted run are claimed again.
+    """
+    spool = Path(path)
+    try:
+        f = open(spool)
+    except FileNotFoundError:
+        f = None
+    if f is not None:
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            if is_current(f, spool) and os.fstat(f.fileno()).st_size:
+                spool.rename(spool.with_name(f'{spool.name}.{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}'))
+    return sorted(spool.parent.glob(f'{spool.name}.*'))
+
+
+def normalize_repository(repository: dict) -> dict:
+    repository = dict(repository)
+    for field in TIMESTAMP_FIELDS:
+        value = repository.get(field)
+        if isinstance(value, (int, float)):
+            repository[field] = datetime.fromtimestamp(value, timezone.utc).isoformat()
+    return repository
+
+
+def read_events(path: Path) -> Iterator[dict]:
+    """Repository objects of supported events, in delivery order."""
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                event = None
+            if not isinstance(event, dict) or not isinstance(event.get('payload'), dict):
+                logger.warning(f'Skipping malformed event {path.name}:{line_number}')
+                continue
+            repository = event['payload'].get('repository')
+            if event.get('event') not in EVENT_TYPES or not repository:
+                continue
+            if not isinstance(repository, dict) or 'id' not in repository:
+                logger.warning(f'Skipping malformed event {path.name}:{line_number}')
+                continue
+            if event['payload'].get('action') == 'deleted':
+                continue
+            yield normalize_repository(repository)
+
+
+def coalesce(repositories) -> Dict[int, dict]:
+    """Keep the last repository object per repo_id.
+
+    Payloads carry absolute counters, so the latest one already includes
+    every earlier star, fork or issue of the batch and redelivered events
+    change nothing.
+    """
+    latest = {}
+    for repository in repositories:
+        latest[repository['id']] = repository
+    return latest
+
+
+def repository_state(repository: dict) -> Optional[dict]:
+    """Mutable columns of ``repositories`` from an event's repository object."""
+    try:
+        return {
+            'b_repo_id': repository['id'],
+            'full_name': repository['full_name'],
+            'html_url': repository['html_url'],
+            'updated_at': datetime.fromisoformat(repository['updated_at']),
+            'pushed_at': datetime.fromisoformat(repository['pushed_at']),
+            'size_kb': int(repository['size']),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
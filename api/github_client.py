@@ -7,6 +7,8 @@ sys.path.append(str(BASE_DIR))
 import httpx
 from typing import List, Optional, Any
 from api.data_schemas import *
+from api.snapshot_batch import SnapshotBatch
+from metrics import REQUEST_LATENCY, REQUEST_STATUS, VALIDATION_TIME, timed
 import logging
 
 logger = logging.getLogger('httpx')
@@ -30,6 +32,15 @@ console_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+# GitHub search returns at most this many results per query, however it is paged
+SEARCH_RESULTS_LIMIT = 1000
+
+class SearchError(Exception):
+    """A search page failed or GitHub flagged its results as incomplete."""
+
+# stargazers listed with this media type carry a starred_at timestamp
+STAR_MEDIA_TYPE = 'application/vnd.github.star+json'
+
 class AsyncGithubAPIClient:
     def __init__(self, base_url: str, headers: dict):
         self.base_url = base_url
@@ -51,12 +62,19 @@ class AsyncGithubAPIClient:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.client.aclose()
 
-    async def _make_request(self, url: str, params: dict = None) -> Optional[Any]:
+    async def _make_request(self, url: str, params: dict = None, endpoint: str = None,
+                            headers: dict = None) -> Optional[Any]:
+        # endpoint is the url template used as metrics label, e.g. /repos/{owner}/{repo}
+        endpoint = endpoint or url
+        status = 'error'
         try:
-            response = await self.client.get(
-                url=self.base_url + url,
-                params=params
-            )
+            with timed(REQUEST_LATENCY.labels(endpoint)):
+                response = await self.client.get(
+                    url=self.base_url + url,
+                    params=params,
+                    headers=headers
+                )
+            status = response.status_code
             response.raise_for_status()
             return response.json()
         
@@ -69,20 +87,46 @@ class AsyncGithubAPIClient:
         except httpx.RequestError as e:
             logger.error(f'Request failed for {url}: {str(e)}')
             return None
+
+        finally:
+            REQUEST_STATUS.labels(endpoint, status).inc()
         
-    async def _fetch(self, endpoint: str, schema):
-        data = await self._make_request(endpoint)
+    async def _fetch(self, url: str, schema, endpoint: str = None):
+        data = await self._make_request(url, endpoint=endpoint)
         if not data:
             return None
-        return schema(**data)
+        with timed(VALIDATION_TIME.labels(schema.__name__)):
+            return schema(**data)
+
+    async def _fetch_into(self, url: str, batch: SnapshotBatch, endpoint: str = None) -> bool:
+        data = await self._make_request(url, endpoint=endpoint)
+        if not data:
+            return False
+        try:
+            with timed(VALIDATION_TIME.labels(type(batch).__name__)):
+                batch.append(data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f'Invalid payload for {url}: {e!r}')
+            return False
+        return True
+
+    async def _search_page(self, params: dict, limit=None):
+        # search has its own, much lower rate limit, so every page waits for the caller's limiter
+        url = '/search/repositories'
+        request = self._make_request(url, params, endpoint=url)
+        return await (limit(request) if limit else request)
 
     async def search_repositories(self, query: str, sort: str = 'stars', 
                            order: str = 'desc', per_page: int = 100, 
-                           max_pages: int = 5) -> List[str]:
+                           max_pages: int = 5, limit=None, strict: bool = False) -> List[str]:
+        """Full names of the top ``max_pages`` pages of ``query``.
+
+        Failed pages are skipped, unless ``strict``: then they, and results
+        GitHub flags as incomplete, raise SearchError.
+        """
         all_repos = []
         
         for page in range(1, max_pages + 1):
-            url = '/search/repositories'
             params = {
                 'q': query,
                 'sort': sort,
@@ -90,7 +134,9 @@ class AsyncGithubAPIClient:
                 'per_page': per_page,
                 'page': page
             }
-            data = await self._make_request(url, params)
+            data = await self._search_page(params, limit)
+            if strict and (not data or 'items' not in data or data.get('incomplete_results')):
+                raise SearchError(f'page {page} of {query}')
             if not data or 'items' not in data:
                 continue
             for repo in data['items']: 
@@ -100,18 +146,67 @@ class AsyncGithubAPIClient:
 
         return all_repos
     
+    async def search_all_repositories(self, query: str, sort: str = 'stars',
+                                      order: str = 'desc', per_page: int = 100,
+                                      limit=None) -> Optional[List[str]]:
+        """Every repository matching ``query``, or None above SEARCH_RESULTS_LIMIT matches.
+
+        A failed page, or results GitHub flags as incomplete (search timed
+        out), raise SearchError.
+        """
+        all_repos = []
+        page = 1
+        while True:
+            params = {
+                'q': query,
+                'sort': sort,
+                'order': order,
+                'per_page': per_page,
+                'page': page
+            }
+            data = await self._search_page(params, limit)
+            if not data or 'items' not in data or data.get('incomplete_results'):
+                raise SearchError(f'page {page} of {query}')
+            if data['total_count'] > SEARCH_RESULTS_LIMIT:
+                return None
+            all_repos.extend(repo['full_name'] for repo in data['items'])
+            if len(all_repos) >= data['total_count'] or len(data['items']) < per_page:
+                return all_repos
+            page += 1
+
     async def fetch_repository(self, owner: str, repo: str) -> Optional[RepositorySchema]:
         endpoint = f'/repos/{owner}/{repo}'
-        return await self._fetch(endpoint, RepositorySchema)
+        return await self._fetch(endpoint, RepositorySchema, '/repos/{owner}/{repo}')
 
     async def fetch_owner(self, owner: str) -> Optional[OwnerSnapshotSchema]: 
         endpoint = f'/users/{owner}'
-        return await self._fetch(endpoint, OwnerSchema)
+        return await self._fetch(endpoint, OwnerSchema, '/users/{owner}')
     
     async def fetch_repository_snapshot(self, owner: str, repo: str) -> Optional[RepositorySnapshotSchema]:
         endpoint = f'/repos/{owner}/{repo}'
-        return await self._fetch(endpoint, RepositorySnapshotSchema)
+        return await self._fetch(endpoint, RepositorySnapshotSchema, '/repos/{owner}/{repo}')
 
     async def fetch_owner_snapshot(self, owner: str) -> Optional[OwnerSnapshotSchema]:
         endpoint = f'/users/{owner}'
-        return await self._fetch(endpoint, OwnerSnapshotSchema)
\ No newline at end of file
+        return await self._fetch(endpoint, OwnerSnapshotSchema, '/users/{owner}')
+
+    async def fetch_repository_snapshot_into(self, owner: str, repo: str, batch: SnapshotBatch) -> bool:
+        endpoint = f'/repos/{owner}/{repo}'
+        return await self._fetch_into(endpoint, batch, '/repos/{owner}/{repo}')
+
+    async def fetch_owner_snapshot_into(self, owner: str, batch: SnapshotBatch) -> bool:
+        endpoint = f'/users/{owner}'
+        return await self._fetch_into(endpoint, batch, '/users/{owner}')
+
+    async def fetch_stargazer_dates(self, owner: str, repo: str, page: int,
+                                    per_page: int = 100) -> Optional[List[str]]:
+        endpoint = f'/repos/{owner}/{repo}/stargazers'
+        data = await self._make_request(
+            endpoint,
+            {'per_page': per_page, 'page': page},
+            endpoint='/repos/{owner}/{repo}/stargazers',
+            headers={'Accept': STAR_MEDIA_TYPE},
+        )
+        if data is None:
+            return None
+        return [item['starred_at'] for item in data]
@@ -0,0 +1,99 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+
+from api.data_schemas import OwnerSnapshotSchema, RepositorySnapshotSchema
+
+
+class SnapshotBatch:
+    """Column-oriented snapshot rows backed by ``array.array``.
+
+    Each row costs a few machine words instead of a Pydantic model plus a
+    ``model_dump`` dict. ``collected_at`` is shared by the whole batch and
+    datetimes are kept as epoch seconds until ``records()`` streams the rows
+    into COPY. Payload keys come from the aliases of ``schema``, so a batch
+    stores exactly what the Pydantic snapshot schema would. ``run_id`` (the
+    snapshot_runs row of the pipeline run) is shared the same way.
+    """
+
+    schema = None
+    table: str = None
+    # column name -> array typecode, in table column order (collected_at excluded)
+    columns: dict = {}
+    datetime_columns: tuple = ()
+
+    def __init__(self, collected_at: datetime, run_id: Optional[int] = None):
+        self.collected_at = collected_at
+        self.run_id = run_id
+        self._data = {name: array(code) for name, code in self.columns.items()}
+        self._keys = {
+            name: self.schema.model_fields[name].alias or name
+            for name in self.columns
+        }
+
+    def __len__(self) -> int:
+        return len(next(iter(self._data.values())))
+
+    @property
+    def column_names(self) -> list:
+        names = list(self.columns)
+        names.insert(1, 'collected_at')
+        names.append('run_id')
+        return names
+
+    def append(self, payload: dict):
+        """Add one row from a GitHub API payload.
+
+        Raises KeyError/ValueError/TypeError on an incomplete payload, in which
+        case nothing is stored.
+        """
+        values = []
+        for name, key in self._keys.items():
+            value = payload[key]
+            if name in self.datetime_columns:
+                value = int(datetime.fromisoformat(value).timestamp())
+            else:
+                value = int(value)
+            values.append(value)
+        for column, value in zip(self._data.values(), values):
+            column.append(value)
+
+    def records(self) -> Iterator[Tuple]:
+        """Rows as tuples in ``column_names`` order, created lazily."""
+        columns = [
+            (name in self.datetime_columns, column)
+            for name, column in self._data.items()
+        ]
+        for i in range(len(self)):
+            row = [
+                datetime.fromtimestamp(column[i], timezone.utc) if is_datetime else column[i]
+                for is_datetime, column in columns
+            ]
+            row.insert(1, self.collected_at)
+            row.append(self.run_id)
+            yield tuple(row)
+
+
+class RepositorySnapshotBatch(SnapshotBatch):
+    schema = RepositorySnapshotSchema
+    table = 'repositories_snapshots'
+    columns = {
+        'repo_id': 'q',
+        'stars': 'i',
+        'forks': 'i',
+        'subscribers_count': 'i',
+        'open_issues': 'i',
+        'size_kb': 'i',
+        'pushed_at': 'q',
+    }
+    datetime_columns = ('pushed_at',)
+
+
+class OwnerSnapshotBatch(SnapshotBatch):
+    schema = OwnerSnapshotSchema
+    table = 'owners_snapshots'
+    columns = {
+        'owner_id': 'q',
+        'followers': 'i',
+        'public_repos': 'i',
+    }
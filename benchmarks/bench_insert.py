@@ -0,0 +1,106 @@
+"""Insert throughput: per-chunk multi-VALUES statements vs the cached executemany path.
+
+    python benchmarks/bench_insert.py --rows 20000 --runs 3
+
+Synthetic owners and owner snapshots are written inside a transaction that is
+rolled back at the end, so the database is left untouched.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from db.models import Owner, OwnerSnapshot
+from db.repositories import GithubStorage, chunked
+from db.session import AsyncSessionLocal, engine
+
+# far above real GitHub ids so synthetic rows never collide with collected data
+ID_OFFSET = 10 ** 15
+
+
+def make_rows(n: int, start: int):
+    now = datetime.now(timezone.utc)
+    owners = [
+        {
+            'owner_id': ID_OFFSET + start + i,
+            'login_name': f'bench-{start + i}',
+            'owner_type': 'User',
+            'created_at': now - timedelta(days=i % 3650),
+        }
+        for i in range(n)
+    ]
+    snapshots = [
+        {
+            'owner_id': o['owner_id'],
+            'collected_at': now,
+            'followers': i % 5000,
+            'public_repos': i % 300,
+        }
+        for i, o in enumerate(owners)
+    ]
+    return owners, snapshots
+
+
+async def legacy_insert(session, model, rows, conflict_column, batch_size):
+    # the previous implementation: a new multi-VALUES statement per chunk
+    for batch in chunked(rows, batch_size):
+        stmt = insert(model).values(batch)
+        stmt = stmt.on_conflict_do_nothing(index_elements=conflict_column)
+        await session.execute(stmt)
+
+
+async def cached_insert(session, model, rows, conflict_column, batch_size):
+    storage = GithubStorage(session, batch_size)
+    await storage._bulk_insert(model, rows, conflict_column=conflict_column)
+
+
+async def measure(session, insert_fn, owners, snapshots, batch_size):
+    wall, cpu = time.perf_counter(), time.process_time()
+    await insert_fn(session, Owner, owners, ['owner_id'], batch_size)
+    await insert_fn(session, OwnerSnapshot, snapshots, ['owner_id', 'collected_at'], batch_size)
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+async def main(rows: int, runs: int, batch_size: int):
+    paths = {'multi-values': legacy_insert, 'executemany': cached_insert}
+    results = {name: [] for name in paths}
+
+    async with AsyncSessionLocal() as session:
+        try:
+            start = 0
+            for _ in range(runs):
+                for name, insert_fn in paths.items():
+                    owners, snapshots = make_rows(rows, start)
+                    start += rows
+                    results[name].append(
+                        await measure(session, insert_fn, owners, snapshots, batch_size)
+                    )
+        finally:
+            await session.rollback()
+    await engine.dispose()
+
+    total_rows = rows * 2
+    print(f'{total_rows} rows per run, batch size {batch_size}, {runs} runs')
+    print(f'{"path":<14}{"rows/sec":>12}{"cpu us/row":>14}')
+    for name, samples in results.items():
+        best_wall = min(w for w, _ in samples)
+        best_cpu = min(c for _, c in samples)
+        print(f'{name:<14}{total_rows / best_wall:>12.0f}{best_cpu / total_rows * 1e6:>14.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=settings.BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs, args.batch_size))
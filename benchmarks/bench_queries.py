@@ -0,0 +1,114 @@
+"""Latency and plans of the dashboard/notebook queries in db/queries.py.
+
+    python benchmarks/bench_queries.py --runs 5 --plans-dir bench_plans
+
+Run after benchmarks/generate_synthetic.py to see how the schema behaves at
+scale. Every query is executed once with EXPLAIN (ANALYZE, BUFFERS) and then
+--runs times for latency; with --plans-dir the JSON plans are written out
+for explain.dalibo.com or pev2.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.generate_synthetic import ID_OFFSET
+from db.queries import (
+    CATEGORY_TIME_SERIES, OWNER_RUN_DELTAS, OWNER_TYPE_BREAKDOWN, REPOSITORY_RUN_DELTAS,
+    TOP_GROWERS_BY_LANGUAGE, TOP_OWNERS_BY_FOLLOWERS_GROWTH, WEEKLY_STAR_DELTAS,
+)
+from db.session import AsyncSessionLocal, engine
+
+# the first two daily runs of benchmarks/generate_synthetic.py
+FIRST_RUN_DELTAS = {'run_id': ID_OFFSET + 1, 'previous_run_id': ID_OFFSET, 'limit': 100}
+
+# name -> (statement, example parameters)
+QUERIES = {
+    'top_growers_by_language': (TOP_GROWERS_BY_LANGUAGE, {'days': 30, 'limit': 10}),
+    'weekly_star_deltas': (WEEKLY_STAR_DELTAS, {'days': 90}),
+    'category_time_series': (CATEGORY_TIME_SERIES, {'category': 'python_fast_growing', 'days': 90}),
+    'owner_type_breakdown': (OWNER_TYPE_BREAKDOWN, {}),
+    'top_owners_by_followers_growth': (TOP_OWNERS_BY_FOLLOWERS_GROWTH, {'days': 30, 'limit': 50}),
+    'repository_run_deltas': (REPOSITORY_RUN_DELTAS, FIRST_RUN_DELTAS),
+    'owner_run_deltas': (OWNER_RUN_DELTAS, FIRST_RUN_DELTAS),
+}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def describe_plan(explain: dict) -> str:
+    plan = explain['Plan']
+    nodes = list(plan_nodes(plan))
+    scans = sorted({
+        f"{n['Node Type']} on {n.get('Index Name') or n['Relation Name']}"
+        for n in nodes if 'Index Name' in n or 'Relation Name' in n
+    })
+    return (
+        f"cost={plan['Total Cost']:.0f} "
+        f"buffers hit={plan.get('Shared Hit Blocks', 0)} read={plan.get('Shared Read Blocks', 0)} "
+        f"| {'; '.join(scans)}"
+    )
+
+
+async def benchmark(session, stmt, params, runs):
+    explain_stmt = text(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {stmt.text}')
+    result = await session.execute(explain_stmt, params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await session.execute(stmt, params)
+        rows = len(result.all())
+        latencies.append((time.perf_counter() - started) * 1000)
+    return plan[0], rows, latencies
+
+
+async def main(runs: int, plans_dir: str, only: list):
+    queries = {
+        name: query for name, query in QUERIES.items()
+        if not only or name in only
+    }
+    if plans_dir:
+        Path(plans_dir).mkdir(parents=True, exist_ok=True)
+
+    async with AsyncSessionLocal() as session:
+        for name, (stmt, params) in queries.items():
+            plan, rows, latencies = await benchmark(session, stmt, params, runs)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f'{name:<32} rows={rows:<6} min={latencies[0]:.1f}ms '
+                f'median={statistics.median(latencies):.1f}ms p95={p95:.1f}ms '
+                f'(explain analyze {plan["Execution Time"]:.1f}ms)'
+            )
+            print(f'{"":<32} {describe_plan(plan)}')
+            if plans_dir:
+                with open(Path(plans_dir) / f'{name}.json', 'w') as f:
+                    json.dump([plan], f, indent=2)
+        await session.rollback()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--plans-dir', default=None)
+    parser.add_argument('--only', nargs='*', default=[], choices=list(QUERIES))
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.plans_dir, args.only))
@@ -0,0 +1,74 @@
+"""Memory held by an update run: Pydantic snapshots + model_dump dicts vs SnapshotBatch.
+
+    python benchmarks/bench_snapshot_memory.py --repos 100000
+
+No network or database is needed; payloads are synthetic /repos responses.
+Each payload is dropped after it is consumed, as in the pipeline, so the
+numbers are what the run retains per repository.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timezone
+
+from api.data_schemas import RepositorySnapshotSchema
+from api.snapshot_batch import RepositorySnapshotBatch
+
+
+def payload(i: int) -> dict:
+    return {
+        'id': 10_000_000 + i,
+        'full_name': f'owner{i}/repo{i}',
+        'stargazers_count': (i * 7919) % 50_000,
+        'forks_count': (i * 104729) % 5_000,
+        'subscribers_count': i % 700,
+        'has_issues': True,
+        'open_issues_count': i % 300,
+        'size': (i * 31) % 200_000,
+        'pushed_at': '2025-11-02T12:34:56Z',
+    }
+
+
+def legacy(n: int):
+    # what update() kept before: the validated models and their dumps
+    models = [RepositorySnapshotSchema(**payload(i)) for i in range(n)]
+    dumps = [m.model_dump(by_alias=False) for m in models]
+    return models, dumps
+
+
+def compact(n: int):
+    batch = RepositorySnapshotBatch(datetime.now(timezone.utc))
+    for i in range(n):
+        batch.append(payload(i))
+    return batch
+
+
+def measure(build, n: int):
+    gc.collect()
+    tracemalloc.start()
+    result = build(n)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main(repos: int):
+    print(f'{repos} repositories')
+    print(f'{"representation":<26}{"retained MiB":>14}{"peak MiB":>10}{"B/row":>8}')
+    for name, build in (('pydantic + model_dump', legacy), ('RepositorySnapshotBatch', compact)):
+        current, peak = measure(build, repos)
+        print(f'{name:<26}{current / 2 ** 20:>14.1f}{peak / 2 ** 20:>10.1f}{current / repos:>8.0f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.repos)
@@ -0,0 +1,230 @@
+"""Fill the database with synthetic owners, repositories and daily snapshots.
+
+    python benchmarks/generate_synthetic.py --repos 100000 --days 120
+
+Meant for the local Postgres from docker-compose.yml (after `alembic upgrade
+head`), never for a database with collected data: ids start at ID_OFFSET, and
+--truncate empties every pipeline table first.
+
+Distributions:
+- stars at tracking start follow a power law (Pareto), like GitHub search results
+- each repository grows along one of several curves (linear, saturating,
+  accelerating, flat) with a log-normal rate scaled by its initial popularity
+- owners have Zipf-like repository counts, 3:1 users to organizations and
+  power-law followers
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+import numpy as np
+
+from config import settings
+
+ID_OFFSET = 10 ** 12
+
+CATEGORIES = {
+    # category -> (language, min stars, max stars)
+    'python_mid_popular': ('Python', 200, 1000),
+    'python_fast_growing': ('Python', 50, 200),
+    'python_top_ecosystem': ('Python', 5000, 200_000),
+    'js_mid_popular': ('JavaScript', 200, 1000),
+    'go_mid_popular': ('Go', 100, 800),
+    'go_fast_growing': ('Go', 50, 150),
+    'rust_mid_popular': ('Rust', 300, 1500),
+    'rust_fast_growing': ('Rust', 50, 300),
+    'java_mid_popular': ('Java', 300, 2000),
+    'java_top_legacy': ('Java', 3000, 100_000),
+}
+
+TABLES = [
+    'discovery_watermarks',
+    'snapshot_runs',
+    'stargazer_backfills',
+    'stargazer_history',
+    'owners_snapshots',
+    'repositories_snapshots',
+    'tracked_repositories',
+    'repositories',
+    'owners',
+]
+
+
+def to_datetimes(epochs):
+    return [datetime.fromtimestamp(int(e), timezone.utc) for e in epochs]
+
+
+class SyntheticData:
+    def __init__(self, repos: int, days: int, seed: int):
+        rng = np.random.default_rng(seed)
+        self.repos = repos
+        self.days = days
+        self.now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+        n_owners = max(1, repos // 3)
+        self.owner_ids = ID_OFFSET + np.arange(n_owners)
+        self.owner_types = np.where(rng.random(n_owners) < 0.75, 'User', 'Organization')
+        self.owner_created = self._epochs_before(rng, n_owners, years=15)
+        self.followers0 = np.minimum((rng.pareto(1.1, n_owners) + 1) * 5, 500_000).astype(np.int64)
+        self.followers_rate = rng.lognormal(-3, 1.5, n_owners)
+        self.public_repos = np.minimum((rng.pareto(1.3, n_owners) + 1) * 8, 5000).astype(np.int64)
+
+        self.repo_ids = ID_OFFSET + np.arange(repos)
+        # Zipf-like: a few owners hold many repositories
+        owner_index = np.minimum(rng.zipf(1.6, repos) - 1, n_owners - 1)
+        self.repo_owner = self.owner_ids[rng.permutation(n_owners)[owner_index]]
+
+        names = list(CATEGORIES)
+        self.category = rng.choice(len(names), repos)
+        self.category_names = np.array(names)[self.category]
+        languages = np.array([CATEGORIES[n][0] for n in names])
+        self.language = languages[self.category]
+        low = np.array([CATEGORIES[n][1] for n in names])[self.category]
+        high = np.array([CATEGORIES[n][2] for n in names])[self.category]
+        self.stars0 = np.minimum(low * (rng.pareto(1.2, repos) + 1), high).astype(np.int64)
+        self.forks_ratio = rng.beta(2, 12, repos)
+        self.watch_ratio = rng.beta(2, 60, repos)
+        self.issues0 = (self.stars0 * rng.beta(1, 40, repos)).astype(np.int64)
+        self.size_kb = np.minimum((rng.pareto(1.0, repos) + 1) * 300, 2_000_000).astype(np.int64)
+        self.created = self._epochs_before(rng, repos, years=10)
+
+        # stars gained by day d: rate * days * shape(d / days), shape in [0, 1]
+        self.rate = self.stars0 * rng.lognormal(-5, 1.2, repos)
+        self.curve = rng.choice(4, repos, p=[0.45, 0.25, 0.1, 0.2])
+        self.push_every = rng.integers(1, 30, repos)
+
+    def _epochs_before(self, rng, n, years):
+        now = self.now.timestamp()
+        return now - rng.random(n) * years * 365 * 86400
+
+    def growth(self, day: int):
+        t = day / max(self.days - 1, 1)
+        shapes = np.array([
+            t,                    # linear
+            1 - np.exp(-4 * t),   # saturating
+            t ** 2.5,             # accelerating
+            0.05 * t,             # flat
+        ])
+        return shapes[self.curve] * self.rate * self.days
+
+    def collected_at(self, day: int) -> datetime:
+        return self.now - timedelta(days=self.days - 1 - day)
+
+    def owners(self):
+        created = to_datetimes(self.owner_created)
+        for i, owner_id in enumerate(self.owner_ids.tolist()):
+            yield owner_id, f'synthetic-{owner_id - ID_OFFSET}', str(self.owner_types[i]), created[i]
+
+    def repositories(self):
+        created = to_datetimes(self.created)
+        first_day = self.collected_at(0)
+        for i, repo_id in enumerate(self.repo_ids.tolist()):
+            full_name = f'synthetic-{int(self.repo_owner[i]) - ID_OFFSET}/repo-{repo_id - ID_OFFSET}'
+            yield (
+                repo_id, int(self.repo_owner[i]), full_name, f'https://github.com/{full_name}',
+                str(self.language[i]), created[i], first_day, first_day, int(self.size_kb[i]),
+                False, True, bool(i % 3), True, True, bool(i % 5 == 0), bool(i % 7 == 0),
+            )
+
+    def tracked(self):
+        started = self.collected_at(0)
+        for i, repo_id in enumerate(self.repo_ids.tolist()):
+            yield repo_id, started, str(self.category_names[i])
+
+    def run_id(self, day: int) -> int:
+        return ID_OFFSET + day
+
+    def run(self, day: int):
+        collected_at = self.collected_at(day)
+        yield (
+            self.run_id(day), 'update', 'succeeded', collected_at,
+            collected_at + timedelta(minutes=20), self.repos, len(self.owner_ids), 0,
+        )
+
+    def repository_snapshots(self, day: int):
+        collected_at = self.collected_at(day)
+        stars = self.stars0 + self.growth(day).astype(np.int64)
+        forks = (stars * self.forks_ratio).astype(np.int64)
+        watchers = (stars * self.watch_ratio).astype(np.int64)
+        issues = self.issues0 + (day * self.issues0 // max(self.days, 1)) // 4
+        last_push_day = day - day % self.push_every
+        pushed_at = [collected_at - timedelta(days=int(d)) for d in (day - last_push_day).tolist()]
+        return zip(
+            self.repo_ids.tolist(), [collected_at] * self.repos, stars.tolist(),
+            forks.tolist(), watchers.tolist(), issues.tolist(), self.size_kb.tolist(), pushed_at,
+            [self.run_id(day)] * self.repos,
+        )
+
+    def owner_snapshots(self, day: int):
+        collected_at = self.collected_at(day)
+        followers = self.followers0 + (self.followers_rate * self.followers0 * day / 100).astype(np.int64)
+        return zip(
+            self.owner_ids.tolist(), [collected_at] * len(self.owner_ids),
+            followers.tolist(), self.public_repos.tolist(), [self.run_id(day)] * len(self.owner_ids),
+        )
+
+
+async def copy(connection, table, columns, records):
+    started = time.perf_counter()
+    result = await connection.copy_records_to_table(table, records=records, columns=columns)
+    return int(result.split()[-1]), time.perf_counter() - started
+
+
+async def main(repos: int, days: int, seed: int, truncate: bool):
+    data = SyntheticData(repos, days, seed)
+    connection = await asyncpg.connect(settings.DB_DSN)
+    try:
+        if truncate:
+            await connection.execute(f'TRUNCATE {", ".join(TABLES)}')
+            print('Truncated pipeline tables')
+
+        await copy(connection, 'owners', ['owner_id', 'login_name', 'owner_type', 'created_at'], data.owners())
+        await copy(connection, 'repositories', [
+            'repo_id', 'owner_id', 'full_name', 'html_url', 'repo_language', 'created_at',
+            'updated_at', 'pushed_at', 'size_kb', 'is_fork', 'has_issues', 'has_projects',
+            'has_downloads', 'has_wiki', 'has_pages', 'has_discussions',
+        ], data.repositories())
+        await copy(connection, 'tracked_repositories', ['repo_id', 'tracking_started_at', 'reason'], data.tracked())
+        print(f'{len(data.owner_ids)} owners, {repos} repositories')
+
+        total_rows, total_seconds = 0, 0.0
+        for day in range(days):
+            await copy(connection, 'snapshot_runs', [
+                'run_id', 'mode', 'status', 'started_at', 'finished_at',
+                'repository_snapshots', 'owner_snapshots', 'failures',
+            ], data.run(day))
+            rows, seconds = await copy(connection, 'repositories_snapshots', [
+                'repo_id', 'collected_at', 'stars', 'forks', 'subscribers_count',
+                'open_issues', 'size_kb', 'pushed_at', 'run_id',
+            ], data.repository_snapshots(day))
+            owner_rows, owner_seconds = await copy(
+                connection, 'owners_snapshots',
+                ['owner_id', 'collected_at', 'followers', 'public_repos', 'run_id'],
+                data.owner_snapshots(day),
+            )
+            total_rows += rows + owner_rows
+            total_seconds += seconds + owner_seconds
+            print(f'day {day + 1}/{days}: {total_rows} snapshot rows, {total_rows / total_seconds:.0f} rows/sec')
+
+        print('Analyzing...')
+        await connection.execute('ANALYZE')
+    finally:
+        await connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--truncate', action='store_true', help='Empty all pipeline tables first')
+    args = parser.parse_args()
+    asyncio.run(main(args.repos, args.days, args.seed, args.truncate))
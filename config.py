@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,6 +16,25 @@ class Settings(BaseSettings):
     BATCH_SIZE: int 
     MAX_RATE: int 
     TIME_PERIOD: int 
+
+    DB_WRITERS: int = 4
+    WRITE_QUEUE_SIZE: int = 8
+    BACKFILL_CONCURRENCY: int = 8
+
+    METRICS_PORT: Optional[int] = None
+    METRICS_FILE: Optional[str] = None
+
+    API_CACHE_TTL: int = 300
+    API_CACHE_SIZE: int = 256
+
+    WEBHOOK_SECRET: Optional[str] = None
+    EVENTS_FILE: str = 'events.jsonl'
+    EVENTS_BATCH_SIZE: int = 1000
+    RECONCILE_AFTER_HOURS: int = 24
+
+    RETENTION_FULL_DAYS: int = 30
+    RETENTION_DAILY_DAYS: int = 365
+    RETENTION_BATCH_SIZE: int = 5000
     
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
@@ -31,5 +51,10 @@ class Settings(BaseSettings):
     def DB_URL(self):
         return (f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@"
                 f"{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}")
+
+    @property
+    def DB_DSN(self):
+        # for plain asyncpg connections (COPY tools, LISTEN)
+        return self.DB_URL.replace('postgresql+asyncpg://', 'postgresql://')
        
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""Index usage, size and bloat of the pipeline tables, plus the heaviest queries.
+
+    python db/index_report.py
+    python db/index_report.py --reset   # reset usage counters after a tuning change
+
+Bloat uses pgstattuple when the extension is installed (CREATE EXTENSION
+pgstattuple) and falls back to dead-tuple ratios otherwise. Query totals come
+from pg_stat_statements, preloaded by postgresql.conf.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from db.session import AsyncSessionLocal, engine
+
+TABLES = (
+    'owners', 'owners_snapshots', 'repositories',
+    'repositories_snapshots', 'tracked_repositories',
+)
+
+INDEX_USAGE = text("""
+SELECT s.relname AS table_name, s.indexrelname AS index_name, am.amname AS method,
+       pg_relation_size(s.indexrelid) AS size_bytes,
+       s.idx_scan, s.idx_tup_read, s.idx_tup_fetch,
+       i.indisprimary OR i.indisunique AS is_constraint
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+JOIN pg_class c ON c.oid = s.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE s.relname = ANY(:tables)
+ORDER BY s.relname, pg_relation_size(s.indexrelid) DESC
+""")
+
+TABLE_STATS = text("""
+SELECT relname AS table_name,
+       pg_table_size(relid) AS table_bytes,
+       pg_indexes_size(relid) AS index_bytes,
+       n_live_tup, n_dead_tup, seq_scan, idx_scan,
+       last_autovacuum, last_autoanalyze
+FROM pg_stat_user_tables
+WHERE relname = ANY(:tables)
+ORDER BY pg_table_size(relid) DESC
+""")
+
+BTREE_BLOAT = text("""
+SELECT avg_leaf_density, leaf_fragmentation FROM pgstatindex(:index_name)
+""")
+
+TOP_STATEMENTS = text("""
+SELECT calls, total_exec_time, mean_exec_time, rows,
+       shared_blks_hit, shared_blks_read, left(regexp_replace(query, '\\s+', ' ', 'g'), 160) AS query
+FROM pg_stat_statements
+WHERE query ~* '(repositories_snapshots|owners_snapshots)'
+ORDER BY total_exec_time DESC
+LIMIT :limit
+""")
+
+
+def mib(size_bytes) -> str:
+    return f'{size_bytes / 2 ** 20:.1f} MiB'
+
+
+async def has_extension(session, name: str) -> bool:
+    result = await session.execute(
+        text('SELECT 1 FROM pg_extension WHERE extname = :name'), {'name': name}
+    )
+    return result.scalar() is not None
+
+
+async def report(session, limit: int):
+    tables = list(TABLES)
+
+    print('== tables ==')
+    for row in (await session.execute(TABLE_STATS, {'tables': tables})).mappings():
+        live, dead = row['n_live_tup'], row['n_dead_tup']
+        dead_ratio = dead / (live + dead) if live + dead else 0
+        print(
+            f"{row['table_name']:<24} table={mib(row['table_bytes']):>12} "
+            f"indexes={mib(row['index_bytes']):>12} rows~{live:<10} dead={dead_ratio:.1%} "
+            f"seq_scan={row['seq_scan']} idx_scan={row['idx_scan']}"
+        )
+
+    pgstattuple = await has_extension(session, 'pgstattuple')
+    print('\n== indexes ==')
+    for row in (await session.execute(INDEX_USAGE, {'tables': tables})).mappings():
+        notes = []
+        if row['idx_scan'] == 0 and not row['is_constraint']:
+            notes.append('UNUSED')
+        if pgstattuple and row['method'] == 'btree':
+            bloat = (await session.execute(BTREE_BLOAT, {'index_name': row['index_name']})).mappings().one()
+            notes.append(
+                f"leaf density {bloat['avg_leaf_density']:.0f}% "
+                f"fragmentation {bloat['leaf_fragmentation']:.0f}%"
+            )
+        print(
+            f"{row['table_name']:<24} {row['index_name']:<40} {row['method']:<6} "
+            f"{mib(row['size_bytes']):>12} scans={row['idx_scan']:<10} {' '.join(notes)}"
+        )
+    if not pgstattuple:
+        print('(CREATE EXTENSION pgstattuple for per-index bloat)')
+
+    print('\n== heaviest snapshot queries (pg_stat_statements) ==')
+    if not await has_extension(session, 'pg_stat_statements'):
+        print('(CREATE EXTENSION pg_stat_statements to collect query statistics)')
+        return
+    for row in (await session.execute(TOP_STATEMENTS, {'limit': limit})).mappings():
+        hit, read = row['shared_blks_hit'], row['shared_blks_read']
+        hit_ratio = hit / (hit + read) if hit + read else 1
+        print(
+            f"total={row['total_exec_time'] / 1000:.1f}s calls={row['calls']} "
+            f"mean={row['mean_exec_time']:.1f}ms rows={row['rows']} cache hit={hit_ratio:.1%}\n"
+            f"    {row['query']}"
+        )
+
+
+async def reset(session):
+    await session.execute(text('SELECT pg_stat_reset()'))
+    if await has_extension(session, 'pg_stat_statements'):
+        await session.execute(text('SELECT pg_stat_statements_reset()'))
+    print('Usage statistics reset')
+
+
+async def main(args):
+    async with AsyncSessionLocal() as session:
+        if args.reset:
+            await reset(session)
+        else:
+            await report(session, args.limit)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--limit', type=int, default=10, help='Number of statements to show')
+    parser.add_argument('--reset', action='store_true', help='Reset index and statement statistics')
+    asyncio.run(main(parser.parse_args()))
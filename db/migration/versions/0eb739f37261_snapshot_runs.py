@@ -0,0 +1,72 @@
+"""snapshot runs
+
+Revision ID: 0eb739f37261
+Revises: e717220b1440
+Create Date: 2026-10-19 15:41:08.337164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0eb739f37261'
+down_revision: Union[str, Sequence[str], None] = 'e717220b1440'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # building the run indexes on large snapshot tables outlives postgresql.conf's statement_timeout
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    op.create_table('snapshot_runs',
+    sa.Column('run_id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('repository_snapshots', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('owner_snapshots', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('failures', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('run_id')
+    )
+    op.create_index('ix_snapshot_runs_started', 'snapshot_runs', ['started_at'], unique=False)
+
+    # nullable without a default: no table rewrite, existing snapshots keep run_id NULL
+    op.add_column('repositories_snapshots', sa.Column('run_id', sa.BigInteger(), nullable=True))
+    op.create_foreign_key(
+        'repositories_snapshots_run_id_fkey', 'repositories_snapshots', 'snapshot_runs',
+        ['run_id'], ['run_id'], ondelete='SET NULL'
+    )
+    op.create_index(
+        'ix_repo_snapshots_run', 'repositories_snapshots', ['run_id', 'repo_id'],
+        unique=False, postgresql_include=['stars', 'forks']
+    )
+
+    op.add_column('owners_snapshots', sa.Column('run_id', sa.BigInteger(), nullable=True))
+    op.create_foreign_key(
+        'owners_snapshots_run_id_fkey', 'owners_snapshots', 'snapshot_runs',
+        ['run_id'], ['run_id'], ondelete='SET NULL'
+    )
+    op.create_index(
+        'ix_owner_snapshots_run', 'owners_snapshots', ['run_id', 'owner_id'],
+        unique=False, postgresql_include=['followers']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_owner_snapshots_run', table_name='owners_snapshots')
+    op.drop_constraint('owners_snapshots_run_id_fkey', 'owners_snapshots', type_='foreignkey')
+    op.drop_column('owners_snapshots', 'run_id')
+
+    op.drop_index('ix_repo_snapshots_run', table_name='repositories_snapshots')
+    op.drop_constraint('repositories_snapshots_run_id_fkey', 'repositories_snapshots', type_='foreignkey')
+    op.drop_column('repositories_snapshots', 'run_id')
+
+    op.drop_index('ix_snapshot_runs_started', table_name='snapshot_runs')
+    op.drop_table('snapshot_runs')
@@ -0,0 +1,74 @@
+"""published snapshots
+
+Revision ID: 132d1ce819fa
+Revises: 0eb739f37261
+Create Date: 2026-10-19 18:02:37.514906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '132d1ce819fa'
+down_revision: Union[str, Sequence[str], None] = '0eb739f37261'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rebuilding the primary keys on large tables outlives postgresql.conf's statement_timeout
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    # run_id joins the covering primary keys, so filtering on published runs stays index-only
+    op.execute(
+        'ALTER TABLE repositories_snapshots '
+        'DROP CONSTRAINT repositories_snapshots_pkey, '
+        'ADD CONSTRAINT repositories_snapshots_pkey '
+        'PRIMARY KEY (repo_id, collected_at) INCLUDE (stars, forks, run_id)'
+    )
+    op.execute(
+        'ALTER TABLE owners_snapshots '
+        'DROP CONSTRAINT owners_snapshots_pkey, '
+        'ADD CONSTRAINT owners_snapshots_pkey '
+        'PRIMARY KEY (owner_id, collected_at) INCLUDE (followers, run_id)'
+    )
+
+    # snapshots of runs that are still running or failed stay invisible to the analytical
+    # queries; rows without run_id predate run tracking
+    op.execute(
+        'CREATE VIEW published_repositories_snapshots AS '
+        'SELECT s.* FROM repositories_snapshots s '
+        'WHERE s.run_id IS NULL '
+        "OR s.run_id IN (SELECT run_id FROM snapshot_runs WHERE status = 'succeeded')"
+    )
+    op.execute(
+        'CREATE VIEW published_owners_snapshots AS '
+        'SELECT s.* FROM owners_snapshots s '
+        'WHERE s.run_id IS NULL '
+        "OR s.run_id IN (SELECT run_id FROM snapshot_runs WHERE status = 'succeeded')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    op.execute('DROP VIEW published_owners_snapshots')
+    op.execute('DROP VIEW published_repositories_snapshots')
+
+    op.execute(
+        'ALTER TABLE owners_snapshots '
+        'DROP CONSTRAINT owners_snapshots_pkey, '
+        'ADD CONSTRAINT owners_snapshots_pkey '
+        'PRIMARY KEY (owner_id, collected_at) INCLUDE (followers)'
+    )
+    op.execute(
+        'ALTER TABLE repositories_snapshots '
+        'DROP CONSTRAINT repositories_snapshots_pkey, '
+        'ADD CONSTRAINT repositories_snapshots_pkey '
+        'PRIMARY KEY (repo_id, collected_at) INCLUDE (stars, forks)'
+    )
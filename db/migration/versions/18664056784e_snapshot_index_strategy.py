@@ -0,0 +1,83 @@
+"""snapshot index strategy
+
+Revision ID: 18664056784e
+Revises: 517e4ad2ac44
+Create Date: 2026-10-19 09:12:41.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '18664056784e'
+down_revision: Union[str, Sequence[str], None] = '517e4ad2ac44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rebuilding the primary keys on large tables outlives postgresql.conf's statement_timeout
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    # duplicates of the primary key, plus B-trees no query filters on
+    op.drop_index('ix_repo_snapshots_repo_collected', table_name='repositories_snapshots')
+    op.drop_index('ix_repo_snapshots_stars', table_name='repositories_snapshots')
+    op.drop_index('ix_repo_snapshots_forks', table_name='repositories_snapshots')
+    op.drop_index('ix_repo_snapshots_collected', table_name='repositories_snapshots')
+    op.drop_index('ix_owner_snapshots_collected', table_name='owners_snapshots')
+    op.drop_index('ix_owner_snapshots_date', table_name='owners_snapshots')
+
+    # covering primary keys: growth and latest-state lookups become index-only scans
+    op.execute(
+        'ALTER TABLE repositories_snapshots '
+        'DROP CONSTRAINT repositories_snapshots_pkey, '
+        'ADD CONSTRAINT repositories_snapshots_pkey '
+        'PRIMARY KEY (repo_id, collected_at) INCLUDE (stars, forks)'
+    )
+    op.execute(
+        'ALTER TABLE owners_snapshots '
+        'DROP CONSTRAINT owners_snapshots_pkey, '
+        'ADD CONSTRAINT owners_snapshots_pkey '
+        'PRIMARY KEY (owner_id, collected_at) INCLUDE (followers)'
+    )
+
+    op.create_index(
+        'ix_repo_snapshots_collected_brin', 'repositories_snapshots', ['collected_at'],
+        unique=False, postgresql_using='brin', postgresql_with={'pages_per_range': 32}
+    )
+    op.create_index(
+        'ix_owner_snapshots_collected_brin', 'owners_snapshots', ['collected_at'],
+        unique=False, postgresql_using='brin', postgresql_with={'pages_per_range': 32}
+    )
+    op.create_index('ix_tracked_reason', 'tracked_repositories', ['reason'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    op.drop_index('ix_tracked_reason', table_name='tracked_repositories')
+    op.drop_index('ix_owner_snapshots_collected_brin', table_name='owners_snapshots')
+    op.drop_index('ix_repo_snapshots_collected_brin', table_name='repositories_snapshots')
+
+    op.execute(
+        'ALTER TABLE owners_snapshots '
+        'DROP CONSTRAINT owners_snapshots_pkey, '
+        'ADD CONSTRAINT owners_snapshots_pkey PRIMARY KEY (owner_id, collected_at)'
+    )
+    op.execute(
+        'ALTER TABLE repositories_snapshots '
+        'DROP CONSTRAINT repositories_snapshots_pkey, '
+        'ADD CONSTRAINT repositories_snapshots_pkey PRIMARY KEY (repo_id, collected_at)'
+    )
+
+    op.create_index('ix_owner_snapshots_date', 'owners_snapshots', ['collected_at'], unique=False)
+    op.create_index('ix_owner_snapshots_collected', 'owners_snapshots', ['owner_id', 'collected_at'], unique=False)
+    op.create_index('ix_repo_snapshots_collected', 'repositories_snapshots', ['collected_at'], unique=False)
+    op.create_index('ix_repo_snapshots_forks', 'repositories_snapshots', ['forks'], unique=False)
+    op.create_index('ix_repo_snapshots_stars', 'repositories_snapshots', ['stars'], unique=False)
+    op.create_index('ix_repo_snapshots_repo_collected', 'repositories_snapshots', ['repo_id', 'collected_at'], unique=False)
@@ -0,0 +1,44 @@
+"""restrict snapshot run delete
+
+Revision ID: 5c2f8e91d7a4
+Revises: 132d1ce819fa
+Create Date: 2026-10-19 19:24:51.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8e91d7a4'
+down_revision: Union[str, Sequence[str], None] = '132d1ce819fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def replace_run_foreign_keys(ondelete: str) -> None:
+    for table in ('repositories_snapshots', 'owners_snapshots'):
+        name = f'{table}_run_id_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(
+            name, table, 'snapshot_runs', ['run_id'], ['run_id'], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # validating the new foreign keys scans the snapshot tables
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    # the published views read run_id NULL as "predates run tracking"; with SET NULL, deleting a
+    # failed or running snapshot_runs row would publish its partial snapshots
+    replace_run_foreign_keys('RESTRICT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('SET LOCAL statement_timeout = 0')
+
+    replace_run_foreign_keys('SET NULL')
@@ -0,0 +1,32 @@
+"""discovery watermarks
+
+Revision ID: a98b8234ffae
+Revises: 18664056784e
+Create Date: 2026-10-19 11:40:07.532114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a98b8234ffae'
+down_revision: Union[str, Sequence[str], None] = '18664056784e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('discovery_watermarks',
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('discovered_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('category')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('discovery_watermarks')
@@ -0,0 +1,43 @@
+"""stargazer history
+
+Revision ID: e717220b1440
+Revises: a98b8234ffae
+Create Date: 2026-10-19 13:05:52.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e717220b1440'
+down_revision: Union[str, Sequence[str], None] = 'a98b8234ffae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stargazer_history',
+    sa.Column('repo_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('stars', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['repo_id'], ['repositories.repo_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('repo_id', 'day')
+    )
+    op.create_table('stargazer_backfills',
+    sa.Column('repo_id', sa.BigInteger(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('stars', sa.Integer(), nullable=False),
+    sa.Column('is_truncated', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['repo_id'], ['repositories.repo_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('repo_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stargazer_backfills')
+    op.drop_table('stargazer_history')
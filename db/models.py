@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import BigInteger, Integer, Boolean, String, ForeignKey, Text, DateTime, Index
+from sqlalchemy import BigInteger, Integer, Boolean, String, ForeignKey, Text, Date, DateTime, Identity, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True  
@@ -41,14 +41,43 @@ class OwnerSnapshot(Base):
     collected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     followers: Mapped[int] = mapped_column(Integer, nullable=False)
     public_repos: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_id: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        ForeignKey('snapshot_runs.run_id', ondelete='RESTRICT'),
+        nullable=True
+    )
 
     owner: Mapped['Owner'] = relationship(
         back_populates='snapshots'
     )
 
     __table_args__ = (
-        Index('ix_owner_snapshots_collected', 'owner_id', 'collected_at'),
-        Index('ix_owner_snapshots_date', 'collected_at'),
+        # covering primary key: per-owner time ranges are index-only scans
+        PrimaryKeyConstraint('owner_id', 'collected_at', postgresql_include=['followers', 'run_id']),
+        # snapshots are appended in time order, so a BRIN index is tiny and cheap to maintain
+        Index(
+            'ix_owner_snapshots_collected_brin', 'collected_at',
+            postgresql_using='brin', postgresql_with={'pages_per_range': 32}
+        ),
+        # run-over-run diffs join two runs on (run_id, owner_id) with index-only scans
+        Index('ix_owner_snapshots_run', 'run_id', 'owner_id', postgresql_include=['followers']),
+    )
+
+class SnapshotRun(Base):
+    __tablename__ = 'snapshot_runs'
+
+    # one row per pipeline run, snapshots written by the run reference it
+    run_id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    repository_snapshots: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    owner_snapshots: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+    failures: Mapped[int] = mapped_column(Integer, nullable=False, server_default='0')
+
+    __table_args__ = (
+        Index('ix_snapshot_runs_started', 'started_at'),
     )
 
 class Repository(Base):
@@ -110,16 +139,26 @@ class RepositorySnapshot(Base):
     open_issues: Mapped[int] = mapped_column(Integer, nullable=False)
     size_kb: Mapped[int] = mapped_column(Integer, nullable=False)
     pushed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    run_id: Mapped[Optional[int]] = mapped_column(
+        BigInteger,
+        ForeignKey('snapshot_runs.run_id', ondelete='RESTRICT'),
+        nullable=True
+    )
 
     repository: Mapped['Repository'] = relationship(
         back_populates='snapshots'
     )
 
     __table_args__ = (
-        Index('ix_repo_snapshots_collected', 'collected_at'),
-        Index('ix_repo_snapshots_repo_collected', 'repo_id', 'collected_at'),
-        Index('ix_repo_snapshots_stars', 'stars'),
-        Index('ix_repo_snapshots_forks', 'forks'),
+        # covering primary key: growth and latest-state queries read stars/forks from the index
+        PrimaryKeyConstraint('repo_id', 'collected_at', postgresql_include=['stars', 'forks', 'run_id']),
+        # snapshots are appended in time order, so a BRIN index is tiny and cheap to maintain
+        Index(
+            'ix_repo_snapshots_collected_brin', 'collected_at',
+            postgresql_using='brin', postgresql_with={'pages_per_range': 32}
+        ),
+        # run-over-run diffs join two runs on (run_id, repo_id) with index-only scans
+        Index('ix_repo_snapshots_run', 'run_id', 'repo_id', postgresql_include=['stars', 'forks']),
     )
 
 class TrackedRepository(Base):
@@ -137,4 +176,36 @@ class TrackedRepository(Base):
 
     __table_args__ = (
         Index('ix_tracked_started', 'tracking_started_at'),
-    )
\ No newline at end of file
+        Index('ix_tracked_reason', 'reason'),
+    )
+
+class DiscoveryWatermark(Base):
+    __tablename__ = 'discovery_watermarks'
+
+    category: Mapped[str] = mapped_column(String(100), primary_key=True)
+    discovered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class StargazerHistory(Base):
+    __tablename__ = 'stargazer_history'
+
+    # cumulative stars per day before tracking started, rebuilt from starred_at timestamps
+    repo_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('repositories.repo_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    stars: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class StargazerBackfill(Base):
+    __tablename__ = 'stargazer_backfills'
+
+    # one row per repository whose history is complete, makes the backfill resumable
+    repo_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('repositories.repo_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    stars: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_truncated: Mapped[bool] = mapped_column(Boolean, nullable=False)
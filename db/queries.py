@@ -0,0 +1,209 @@
+from sqlalchemy import text
+from typing import List, Dict, Optional
+
+# Analytical queries behind the dashboard and the notebooks. They are plain SQL
+# because they lean on window functions and DISTINCT ON; the benchmark suite
+# and any read-side consumer share these exact statements. They read the
+# published_* views, which hide snapshots of runs that have not succeeded, so a
+# failed or running --update never shows up as a partial time point.
+
+TOP_GROWERS_BY_LANGUAGE = text("""
+WITH bounds AS (
+    SELECT repo_id, min(collected_at) AS first_at, max(collected_at) AS last_at
+    FROM published_repositories_snapshots
+    WHERE collected_at >= now() - make_interval(days => :days)
+    GROUP BY repo_id
+),
+growth AS (
+    SELECT r.repo_id, r.full_name, r.repo_language,
+           last.stars - first.stars AS stars_growth,
+           last.stars AS stars
+    FROM bounds b
+    JOIN published_repositories_snapshots first
+      ON first.repo_id = b.repo_id AND first.collected_at = b.first_at
+    JOIN published_repositories_snapshots last
+      ON last.repo_id = b.repo_id AND last.collected_at = b.last_at
+    JOIN repositories r ON r.repo_id = b.repo_id
+),
+ranked AS (
+    SELECT *, row_number() OVER (
+        PARTITION BY repo_language ORDER BY stars_growth DESC
+    ) AS rank
+    FROM growth
+)
+SELECT repo_language, full_name, stars, stars_growth, rank
+FROM ranked
+WHERE rank <= :limit
+ORDER BY repo_language, rank
+""")
+
+WEEKLY_STAR_DELTAS = text("""
+WITH weekly AS (
+    SELECT repo_id, date_trunc('week', collected_at) AS week, max(stars) AS stars
+    FROM published_repositories_snapshots
+    WHERE collected_at >= now() - make_interval(days => :days)
+    GROUP BY repo_id, week
+),
+deltas AS (
+    SELECT t.reason AS category, w.week,
+           w.stars - lag(w.stars) OVER (PARTITION BY w.repo_id ORDER BY w.week) AS delta
+    FROM weekly w
+    JOIN tracked_repositories t ON t.repo_id = w.repo_id
+)
+SELECT category, week, sum(delta) AS stars_delta, count(delta) AS repos
+FROM deltas
+WHERE delta IS NOT NULL
+GROUP BY category, week
+ORDER BY category, week
+""")
+
+CATEGORY_TIME_SERIES = text("""
+WITH daily AS (
+    SELECT DISTINCT ON (s.repo_id, date_trunc('day', s.collected_at))
+           date_trunc('day', s.collected_at) AS day, s.stars, s.forks, s.open_issues
+    FROM published_repositories_snapshots s
+    JOIN tracked_repositories t ON t.repo_id = s.repo_id
+    WHERE t.reason = :category
+      AND s.collected_at >= now() - make_interval(days => :days)
+    ORDER BY s.repo_id, date_trunc('day', s.collected_at), s.collected_at DESC
+)
+SELECT day, count(*) AS repos, sum(stars) AS stars, sum(forks) AS forks,
+       sum(open_issues) AS open_issues
+FROM daily
+GROUP BY day
+ORDER BY day
+""")
+
+OWNER_TYPE_BREAKDOWN = text("""
+WITH latest AS (
+    SELECT DISTINCT ON (repo_id) repo_id, stars, forks
+    FROM published_repositories_snapshots
+    ORDER BY repo_id, collected_at DESC
+)
+SELECT o.owner_type, count(*) AS repos,
+       avg(l.stars)::float AS avg_stars,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY l.stars) AS median_stars,
+       avg(l.forks)::float AS avg_forks
+FROM latest l
+JOIN repositories r ON r.repo_id = l.repo_id
+JOIN owners o ON o.owner_id = r.owner_id
+GROUP BY o.owner_type
+ORDER BY repos DESC
+""")
+
+TOP_OWNERS_BY_FOLLOWERS_GROWTH = text("""
+WITH bounds AS (
+    SELECT owner_id, min(collected_at) AS first_at, max(collected_at) AS last_at
+    FROM published_owners_snapshots
+    WHERE collected_at >= now() - make_interval(days => :days)
+    GROUP BY owner_id
+)
+SELECT o.login_name, o.owner_type, last.followers,
+       last.followers - first.followers AS followers_growth
+FROM bounds b
+JOIN published_owners_snapshots first
+  ON first.owner_id = b.owner_id AND first.collected_at = b.first_at
+JOIN published_owners_snapshots last
+  ON last.owner_id = b.owner_id AND last.collected_at = b.last_at
+JOIN owners o ON o.owner_id = b.owner_id
+ORDER BY followers_growth DESC
+LIMIT :limit
+""")
+
+# Run-over-run diffs: both sides are picked by run_id, so the join is an equality
+# join over ix_repo_snapshots_run / ix_owner_snapshots_run instead of windows
+# over collected_at.
+
+RECENT_RUNS = text("""
+SELECT run_id, mode, status, started_at, finished_at,
+       repository_snapshots, owner_snapshots, failures
+FROM snapshot_runs
+ORDER BY run_id DESC
+LIMIT :limit
+""")
+
+PREVIOUS_RUN = text("""
+SELECT run_id
+FROM snapshot_runs
+WHERE run_id < :run_id AND status = 'succeeded' AND mode = 'update'
+  AND CASE WHEN :owners THEN owner_snapshots ELSE repository_snapshots END > 0
+ORDER BY run_id DESC
+LIMIT 1
+""")
+
+REPOSITORY_RUN_DELTAS = text("""
+SELECT r.full_name, cur.stars, cur.stars - prev.stars AS stars_delta,
+       cur.forks, cur.forks - prev.forks AS forks_delta
+FROM repositories_snapshots cur
+JOIN repositories_snapshots prev
+  ON prev.run_id = :previous_run_id AND prev.repo_id = cur.repo_id
+JOIN repositories r ON r.repo_id = cur.repo_id
+WHERE cur.run_id = :run_id
+ORDER BY stars_delta DESC
+LIMIT :limit
+""")
+
+OWNER_RUN_DELTAS = text("""
+SELECT o.login_name, cur.followers, cur.followers - prev.followers AS followers_delta
+FROM owners_snapshots cur
+JOIN owners_snapshots prev
+  ON prev.run_id = :previous_run_id AND prev.owner_id = cur.owner_id
+JOIN owners o ON o.owner_id = cur.owner_id
+WHERE cur.run_id = :run_id
+ORDER BY followers_delta DESC
+LIMIT :limit
+""")
+
+
+class AnalyticsStorage:
+    def __init__(self, session):
+        self.session = session
+
+    async def _fetch(self, stmt, **params) -> List[Dict]:
+        result = await self.session.execute(stmt, params)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def top_growers_by_language(self, days: int, limit: int) -> List[Dict]:
+        return await self._fetch(TOP_GROWERS_BY_LANGUAGE, days=days, limit=limit)
+
+    async def weekly_star_deltas(self, days: int) -> List[Dict]:
+        return await self._fetch(WEEKLY_STAR_DELTAS, days=days)
+
+    async def category_time_series(self, category: str, days: int) -> List[Dict]:
+        return await self._fetch(CATEGORY_TIME_SERIES, category=category, days=days)
+
+    async def owner_type_breakdown(self) -> List[Dict]:
+        return await self._fetch(OWNER_TYPE_BREAKDOWN)
+
+    async def top_owners_by_followers_growth(self, days: int, limit: int) -> List[Dict]:
+        return await self._fetch(TOP_OWNERS_BY_FOLLOWERS_GROWTH, days=days, limit=limit)
+
+    async def recent_runs(self, limit: int) -> List[Dict]:
+        return await self._fetch(RECENT_RUNS, limit=limit)
+
+    async def previous_run_id(self, run_id: int, owners: bool = False) -> Optional[int]:
+        """Last successful --update run before ``run_id`` that wrote repository (owner) snapshots.
+
+        --events runs only cover repositories that had events or were due for
+        reconciliation, so they make a poor baseline.
+        """
+        result = await self.session.execute(PREVIOUS_RUN, {'run_id': run_id, 'owners': owners})
+        return result.scalar_one_or_none()
+
+    async def repository_run_deltas(self, run_id: int, previous_run_id: Optional[int] = None,
+                                    limit: int = 100) -> List[Dict]:
+        """Star/fork changes of repositories present in both runs, against the last
+        successful --update run by default."""
+        if previous_run_id is None:
+            previous_run_id = await self.previous_run_id(run_id)
+        return await self._fetch(
+            REPOSITORY_RUN_DELTAS, run_id=run_id, previous_run_id=previous_run_id, limit=limit
+        )
+
+    async def owner_run_deltas(self, run_id: int, previous_run_id: Optional[int] = None,
+                               limit: int = 100) -> List[Dict]:
+        if previous_run_id is None:
+            previous_run_id = await self.previous_run_id(run_id, owners=True)
+        return await self._fetch(
+            OWNER_RUN_DELTAS, run_id=run_id, previous_run_id=previous_run_id, limit=limit
+        )
@@ -1,38 +1,66 @@
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import select
-from typing import List, Dict, AsyncGenerator
+from sqlalchemy import bindparam, or_, select, text, update
+from typing import List, Dict, AsyncGenerator, Optional, Set
+from datetime import datetime
+from metrics import INSERT_LATENCY, ROWS_WRITTEN, timed
 from db.models import (
     Owner,
     Repository,
     OwnerSnapshot,
     RepositorySnapshot,
-    TrackedRepository
+    TrackedRepository,
+    DiscoveryWatermark,
+    StargazerHistory,
+    StargazerBackfill,
+    SnapshotRun
 )
 
+# NOTIFY channel announcing committed snapshots (read API cache invalidation)
+SNAPSHOTS_CHANNEL = 'snapshots_committed'
+
 
 def chunked(iterable: List[dict], size: int):
     for i in range(0, len(iterable), size):
         yield iterable[i:i + size]
 
 class GithubStorage:
+    # one compiled INSERT per (model, conflict columns), shared by all instances
+    # so asyncpg sees the same SQL text and reuses its prepared statement
+    _insert_statements = {}
+
     def __init__(self, session, batch_size):
         self.session = session
         self.batch_size = batch_size
 
+    @classmethod
+    def _insert_statement(cls, model, conflict_column: List[str] = None):
+        key = (model, tuple(conflict_column or ()))
+        stmt = cls._insert_statements.get(key)
+        if stmt is None:
+            stmt = insert(model.__table__)
+            if conflict_column:
+                stmt = stmt.on_conflict_do_nothing(
+                    index_elements=conflict_column
+                )
+            cls._insert_statements[key] = stmt
+        return stmt
+
     async def _bulk_insert(
         self,
         model,
         rows: List[Dict],
         conflict_column: List[str] = None,
     ):
+        if not rows:
+            return
+        stmt = self._insert_statement(model, conflict_column)
+        connection = await self.session.connection()
+        table = model.__tablename__
         for batch in chunked(rows, self.batch_size):
-            stmt = insert(model).values(batch)
-
-            if conflict_column:
-                stmt = stmt.on_conflict_do_nothing(
-                    index_elements=conflict_column
-                )
-            await self.session.execute(stmt)
+            # a list of parameter sets runs as executemany over one prepared statement
+            with timed(INSERT_LATENCY.labels(table)):
+                await connection.execute(stmt, batch)
+            ROWS_WRITTEN.labels(table).inc(len(batch))
 
     async def bulk_insert_owners(self, owners: list[dict]):
         await self._bulk_insert(
@@ -69,6 +97,54 @@ class GithubStorage:
             conflict_column=['repo_id'],
         )
     
+    async def bulk_insert_stargazer_history(self, rows: List[Dict]):
+        await self._bulk_insert(
+            StargazerHistory,
+            rows,
+            conflict_column=['repo_id', 'day'],
+        )
+
+    async def bulk_insert_stargazer_backfills(self, rows: List[Dict]):
+        await self._bulk_insert(
+            StargazerBackfill,
+            rows,
+            conflict_column=['repo_id'],
+        )
+
+    async def update_repository_state(self, rows: List[Dict]):
+        """Refresh name and activity columns of existing repositories (keyed by b_repo_id)."""
+        if not rows:
+            return
+        table = Repository.__table__
+        stmt = (
+            update(table)
+            .where(table.c.repo_id == bindparam('b_repo_id'))
+            .values({
+                column: bindparam(column)
+                for column in ('full_name', 'html_url', 'updated_at', 'pushed_at', 'size_kb')
+            })
+        )
+        connection = await self.session.connection()
+        for batch in chunked(rows, self.batch_size):
+            with timed(INSERT_LATENCY.labels(table.name)):
+                await connection.execute(stmt, batch)
+            ROWS_WRITTEN.labels(table.name).inc(len(batch))
+
+    async def copy_snapshots(self, batch):
+        """COPY a SnapshotBatch straight into its table, no per-row dicts."""
+        if not len(batch):
+            return
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        # every row of a batch shares collected_at, so the primary key cannot conflict
+        with timed(INSERT_LATENCY.labels(batch.table)):
+            await raw_connection.driver_connection.copy_records_to_table(
+                batch.table,
+                records=batch.records(),
+                columns=batch.column_names,
+            )
+        ROWS_WRITTEN.labels(batch.table).inc(len(batch))
+
     async def get_all_tracked_repository_full_names_batch(self) -> AsyncGenerator[List[str], None]:
         offset = 0
 
@@ -93,6 +169,126 @@ class GithubStorage:
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
+    async def get_tracked_full_names(self, full_names: List[str]) -> Set[str]:
+        tracked = set()
+        for batch in chunked(list(full_names), self.batch_size):
+            stmt = (
+                select(Repository.full_name)
+                .join(Repository.tracked_info)
+                .where(Repository.full_name.in_(batch))
+            )
+            result = await self.session.execute(stmt)
+            tracked.update(result.scalars().all())
+        return tracked
+
+    async def get_latest_subscribers(self, repo_ids: List[int]) -> Dict[int, int]:
+        """subscribers_count of the latest snapshot, for the tracked ones of ``repo_ids``."""
+        subscribers = {}
+        for batch in chunked(list(repo_ids), self.batch_size):
+            stmt = (
+                select(RepositorySnapshot.repo_id, RepositorySnapshot.subscribers_count)
+                .join(TrackedRepository, TrackedRepository.repo_id == RepositorySnapshot.repo_id)
+                .where(RepositorySnapshot.repo_id.in_(batch))
+                .distinct(RepositorySnapshot.repo_id)
+                .order_by(RepositorySnapshot.repo_id, RepositorySnapshot.collected_at.desc())
+            )
+            result = await self.session.execute(stmt)
+            subscribers.update(result.tuples().all())
+        return subscribers
+
+    async def get_stale_tracked_full_names(self, before: datetime, run_id: int) -> List[str]:
+        """Tracked repositories without a published snapshot, or one of ``run_id``, since ``before``."""
+        # probes the (repo_id, collected_at) primary key instead of aggregating every snapshot
+        recent = (
+            select(RepositorySnapshot.repo_id)
+            .where(
+                RepositorySnapshot.repo_id == Repository.repo_id,
+                RepositorySnapshot.collected_at >= before,
+                or_(
+                    RepositorySnapshot.run_id.is_(None),
+                    RepositorySnapshot.run_id == run_id,
+                    RepositorySnapshot.run_id.in_(
+                        select(SnapshotRun.run_id).where(SnapshotRun.status == 'succeeded')
+                    ),
+                ),
+            )
+            .exists()
+        )
+        stmt = (
+            select(Repository.full_name)
+            .join(TrackedRepository, TrackedRepository.repo_id == Repository.repo_id)
+            .where(~recent)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_stargazer_backfill_candidates(self) -> List[Dict]:
+        """Tracked repositories without a completed backfill, with their latest star count."""
+        latest = (
+            select(RepositorySnapshot.repo_id, RepositorySnapshot.stars)
+            .distinct(RepositorySnapshot.repo_id)
+            .order_by(RepositorySnapshot.repo_id, RepositorySnapshot.collected_at.desc())
+            .subquery()
+        )
+        stmt = (
+            select(
+                Repository.repo_id,
+                Repository.full_name,
+                TrackedRepository.tracking_started_at,
+                latest.c.stars,
+            )
+            .join(TrackedRepository, TrackedRepository.repo_id == Repository.repo_id)
+            .join(latest, latest.c.repo_id == Repository.repo_id)
+            .outerjoin(StargazerBackfill, StargazerBackfill.repo_id == Repository.repo_id)
+            .where(StargazerBackfill.repo_id.is_(None))
+        )
+        result = await self.session.execute(stmt)
+        return [dict(row) for row in result.mappings().all()]
+
+    async def get_discovery_watermark(self, category: str) -> Optional[datetime]:
+        stmt = (
+            select(DiscoveryWatermark.discovered_at)
+            .where(DiscoveryWatermark.category == category)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def set_discovery_watermark(self, category: str, discovered_at: datetime):
+        stmt = (
+            insert(DiscoveryWatermark)
+            .values(category=category, discovered_at=discovered_at)
+            .on_conflict_do_update(
+                index_elements=['category'],
+                set_={'discovered_at': discovered_at},
+            )
+        )
+        await self.session.execute(stmt)
+
+    async def start_snapshot_run(self, mode: str, started_at: datetime) -> int:
+        stmt = (
+            insert(SnapshotRun)
+            .values(mode=mode, status='running', started_at=started_at)
+            .returning(SnapshotRun.run_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def finish_snapshot_run(self, run_id: int, status: str, finished_at: datetime, **counts):
+        """Close a run; ``counts`` are repository_snapshots, owner_snapshots and failures."""
+        stmt = (
+            update(SnapshotRun)
+            .where(SnapshotRun.run_id == run_id)
+            .values(status=status, finished_at=finished_at, **counts)
+        )
+        await self.session.execute(stmt)
+
+    async def notify_snapshots_committed(self, payload: str = ''):
+        # delivered to listeners when the surrounding transaction commits
+        await self.session.execute(
+            text('SELECT pg_notify(:channel, :payload)'),
+            {'channel': SNAPSHOTS_CHANNEL, 'payload': payload},
+        )
+
     async def commit(self):
         await self.session.commit()
 
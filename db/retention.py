@@ -0,0 +1,218 @@
+"""Downsample old repository and owner snapshots to daily and weekly points.
+
+    python db/retention.py
+    python db/retention.py --dry-run   # count what would be removed
+
+Every snapshot is kept for RETENTION_FULL_DAYS, one per day up to
+RETENTION_DAILY_DAYS and one per week beyond.
+
+Snapshots hold cumulative counters, so the last snapshot of each repository
+(owner) per day or week is the downsampled point; the others are deleted.
+Snapshots of published runs are kept over those of failed runs.
+Work goes one bucket-aligned window of collected_at at a time. The
+superseded (key, collected_at) pairs of a window are ranked once into a
+numbered temporary table, which DELETEs of at most --batch-size rows then
+walk by position, each in its own transaction, so every statement stays
+under lock_timeout and statement_timeout from postgresql.conf. A batch that
+hits either timeout is retried smaller. Already downsampled windows hold one
+row per bucket, so reruns are cheap and the job can run from cron. Deleted
+rows leave holes that new snapshots fill, which widens the BRIN ranges (see
+the README).
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from config import settings
+from db.session import AsyncSessionLocal, engine
+
+logger = logging.getLogger('pipeline.retention')
+
+# table -> entity key column
+TABLES = {
+    'repositories_snapshots': 'repo_id',
+    'owners_snapshots': 'owner_id',
+}
+
+# lock_not_available (lock_timeout), query_canceled (statement_timeout)
+RETRY_SQLSTATES = {'55P03', '57014'}
+MAX_RETRIES = 5
+MIN_BATCH_SIZE = 100
+
+SUPERSEDED = """
+SELECT {key}, collected_at FROM (
+    SELECT s.{key}, s.collected_at,
+           row_number() OVER (
+               PARTITION BY s.{key}, date_trunc(:unit, s.collected_at AT TIME ZONE 'UTC')
+               ORDER BY coalesce(s.run_id IS NULL OR r.status = 'succeeded', false) DESC,
+                        s.collected_at DESC
+           ) AS position
+    FROM {table} s
+    LEFT JOIN snapshot_runs r ON r.run_id = s.run_id
+    WHERE s.collected_at >= :window_start AND s.collected_at < :window_end
+) bucketed
+WHERE position > 1
+"""
+
+# temporary, so one per connection
+SCRATCH = 'retention_superseded'
+
+# CREATE TABLE AS takes no bind parameters, so the rows go in with INSERT
+CREATE_SCRATCH = f"""
+CREATE TEMPORARY TABLE {SCRATCH} AS
+SELECT 0::bigint AS position, {{key}} AS entity_id, collected_at FROM {{table}}
+WITH NO DATA
+"""
+
+FILL_SCRATCH = f"""
+INSERT INTO {SCRATCH}
+SELECT row_number() OVER (), {{key}}, collected_at FROM ({{superseded}}) superseded
+"""
+
+DELETE_BATCH = f"""
+DELETE FROM {{table}} t
+USING {SCRATCH} s
+WHERE s.position > :after AND s.position <= :until
+  AND t.{{key}} = s.entity_id AND t.collected_at = s.collected_at
+"""
+
+COUNT = 'SELECT count(*) FROM ({superseded}) superseded'
+
+
+def floor_day(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def floor_week(moment: datetime) -> datetime:
+    # date_trunc('week') starts weeks on Monday
+    return floor_day(moment) - timedelta(days=moment.weekday())
+
+
+def windows(start: datetime, end: datetime, step: timedelta):
+    while start < end:
+        yield start, min(start + step, end)
+        start += step
+
+
+def tiers(oldest: datetime, now: datetime):
+    """(unit, window_start, window_end) from the oldest snapshot up to the full-resolution horizon."""
+    full_horizon = floor_day(now - timedelta(days=settings.RETENTION_FULL_DAYS))
+    # the daily tier starts on a week boundary so no week is split between tiers
+    daily_horizon = min(
+        floor_week(now - timedelta(days=settings.RETENTION_DAILY_DAYS)), full_horizon
+    )
+    for window in windows(floor_week(oldest), daily_horizon, timedelta(weeks=1)):
+        yield 'week', *window
+    for window in windows(max(floor_day(oldest), daily_horizon), full_horizon, timedelta(days=1)):
+        yield 'day', *window
+
+
+async def fill_scratch(conn, table: str, key: str, unit: str, window_start, window_end) -> int:
+    """Rank the window once into the scratch table; returns the number of superseded rows."""
+    await conn.execute(text(f'DROP TABLE IF EXISTS {SCRATCH}'))
+    await conn.execute(text(CREATE_SCRATCH.format(table=table, key=key)))
+    # a single read of the window that takes no locks writers wait on, so it may outlive statement_timeout
+    await conn.execute(text('SET LOCAL statement_timeout = 0'))
+    await conn.execute(
+        text(FILL_SCRATCH.format(superseded=SUPERSEDED.format(table=table, key=key), key=key)),
+        {'unit': unit, 'window_start': window_start, 'window_end': window_end},
+    )
+    await conn.execute(text(f'CREATE INDEX ON {SCRATCH} (position)'))
+    await conn.execute(text(f'ANALYZE {SCRATCH}'))
+    total = (await conn.execute(text(f'SELECT count(*) FROM {SCRATCH}'))).scalar()
+    await conn.commit()
+    return total
+
+
+async def downsample_window(table: str, key: str, unit: str, window_start, window_end,
+                            batch_size: int) -> int:
+    statement = text(DELETE_BATCH.format(table=table, key=key))
+    deleted = 0
+    retries = 0
+    # the scratch table is temporary, so every batch of the window runs on this connection
+    async with engine.connect() as conn:
+        total = await fill_scratch(conn, table, key, unit, window_start, window_end)
+        after = 0
+        while after < total:
+            try:
+                result = await conn.execute(statement, {'after': after, 'until': after + batch_size})
+                await conn.commit()
+            except DBAPIError as e:
+                await conn.rollback()
+                if getattr(e.orig, 'sqlstate', None) not in RETRY_SQLSTATES or retries == MAX_RETRIES:
+                    raise
+                retries += 1
+                batch_size = max(batch_size // 2, MIN_BATCH_SIZE)
+                logger.warning(
+                    f'{table} {window_start:%Y-%m-%d}: {e.orig.__class__.__name__}, '
+                    f'retrying with batch size {batch_size}'
+                )
+                await asyncio.sleep(2 ** retries)
+                continue
+            deleted += result.rowcount
+            after += batch_size
+            # MAX_RETRIES bounds the attempts at one batch, not the timeouts of the whole window
+            retries = 0
+        await conn.execute(text(f'DROP TABLE {SCRATCH}'))
+        await conn.commit()
+    return deleted
+
+
+async def count_window(table: str, key: str, unit: str, window_start, window_end) -> int:
+    statement = text(COUNT.format(superseded=SUPERSEDED.format(table=table, key=key)))
+    async with AsyncSessionLocal() as session:
+        # the same ranking as fill_scratch, so the same exemption from statement_timeout
+        await session.execute(text('SET LOCAL statement_timeout = 0'))
+        result = await session.execute(statement, {
+            'unit': unit, 'window_start': window_start, 'window_end': window_end,
+        })
+        return result.scalar()
+
+
+async def oldest_snapshot(table: str):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(text(f'SELECT min(collected_at) FROM {table}'))
+        return result.scalar()
+
+
+async def main(args):
+    now = datetime.now(timezone.utc)
+    try:
+        for table, key in TABLES.items():
+            oldest = await oldest_snapshot(table)
+            if oldest is None:
+                continue
+            total = 0
+            for unit, window_start, window_end in tiers(oldest, now):
+                if args.dry_run:
+                    rows = await count_window(table, key, unit, window_start, window_end)
+                else:
+                    rows = await downsample_window(
+                        table, key, unit, window_start, window_end, args.batch_size
+                    )
+                if rows:
+                    logger.info(f'{table} {window_start:%Y-%m-%d} ({unit}): {rows} rows')
+                total += rows
+            action = 'would delete' if args.dry_run else 'deleted'
+            logger.info(f'{table}: {action} {total} superseded snapshots')
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='Only count superseded snapshots')
+    parser.add_argument('--batch-size', type=int, default=settings.RETENTION_BATCH_SIZE,
+                        help='Rows per DELETE statement')
+    asyncio.run(main(parser.parse_args()))
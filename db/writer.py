@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import List, Dict
+
+from db.repositories import GithubStorage, chunked
+from metrics import QUEUE_DEPTH
+
+logger = logging.getLogger('pipeline.writer')
+
+
+class ConcurrentWriter:
+    """Fans insert batches out over several pooled connections.
+
+    Every batch is inserted and committed by its own session, so up to
+    ``workers`` connections write at once. The queue is bounded: ``write()``
+    blocks while it is full, which pushes back on the fetch side.
+
+    Inserts are ``ON CONFLICT DO NOTHING``, so a batch is idempotent and a
+    failed run can simply be repeated. Snapshot batches committed by a run
+    that fails stay out of the analytical queries, which only read snapshots
+    of succeeded snapshot_runs. Foreign-key order is kept by the caller
+    with ``flush()``: owners are flushed before repositories, repositories
+    before tracked repositories and snapshots.
+    """
+
+    def __init__(self, session_factory, batch_size: int, workers: int, queue_size: int):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.errors = []
+        self._tasks = []
+
+    async def __aenter__(self):
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.flush()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _worker(self):
+        while True:
+            method, batch = await self.queue.get()
+            QUEUE_DEPTH.set(self.queue.qsize())
+            try:
+                # after the first failure the remaining batches are drained, not written
+                if not self.errors:
+                    await self._insert(method, batch)
+            except Exception as e:
+                logger.error(f'Error during DB in {method}: {e}')
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    async def _insert(self, method: str, batch: List[Dict]):
+        async with self.session_factory() as session:
+            storage = GithubStorage(session, self.batch_size)
+            try:
+                await getattr(storage, method)(batch)
+                await storage.commit()
+            except Exception:
+                await storage.rollback()
+                raise
+
+    def _raise_errors(self):
+        if self.errors:
+            raise self.errors[0]
+
+    async def write(self, method: str, rows: List[Dict]):
+        """Queue ``rows`` for ``GithubStorage.<method>`` in batch_size chunks."""
+        self._raise_errors()
+        for batch in chunked(rows, self.batch_size):
+            await self.queue.put((method, batch))
+            QUEUE_DEPTH.set(self.queue.qsize())
+
+    async def write_batch(self, method: str, batch):
+        """Queue a prebuilt batch (e.g. a SnapshotBatch) as is."""
+        self._raise_errors()
+        await self.queue.put((method, batch))
+        QUEUE_DEPTH.set(self.queue.qsize())
+
+    async def flush(self):
+        """Wait until every queued batch is committed."""
+        await self.queue.join()
+        self._raise_errors()
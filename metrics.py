@@ -0,0 +1,133 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+    write_to_textfile,
+)
+
+registry = CollectorRegistry()
+
+REQUEST_LATENCY = Histogram(
+    'github_request_duration_seconds',
+    'GitHub API request latency',
+    ['endpoint'],
+    registry=registry,
+)
+REQUEST_STATUS = Counter(
+    'github_requests',
+    'GitHub API responses by status code',
+    ['endpoint', 'status'],
+    registry=registry,
+)
+LIMITER_WAIT = Histogram(
+    'rate_limiter_wait_seconds',
+    'Time spent waiting for the rate limiter',
+    registry=registry,
+)
+VALIDATION_TIME = Histogram(
+    'schema_validation_duration_seconds',
+    'Pydantic validation time per response',
+    ['schema'],
+    buckets=(.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .05),
+    registry=registry,
+)
+ROWS_WRITTEN = Counter(
+    'db_rows_written',
+    'Rows sent to the database per table',
+    ['table'],
+    registry=registry,
+)
+INSERT_LATENCY = Histogram(
+    'db_insert_duration_seconds',
+    'Insert latency per batch and table',
+    ['table'],
+    registry=registry,
+)
+QUEUE_DEPTH = Gauge(
+    'writer_queue_depth',
+    'Batches waiting in the writer queue',
+    registry=registry,
+)
+EVENTS_APPLIED = Counter(
+    'webhook_events_applied',
+    'Repository snapshots written from webhook events',
+    registry=registry,
+)
+PHASE_DURATION = Counter(
+    'pipeline_phase_duration_seconds',
+    'Wall time spent per pipeline phase',
+    ['phase'],
+    registry=registry,
+)
+
+
+@contextmanager
+def timed(histogram):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_DURATION.labels(name).inc(time.perf_counter() - started)
+
+
+def serve(port: int):
+    """Expose the registry as a Prometheus text endpoint for the run."""
+    start_http_server(port, registry=registry)
+
+
+def export(path: str):
+    """Write the registry in the Prometheus text format (textfile collector)."""
+    write_to_textfile(path, registry)
+
+
+def summary() -> list[str]:
+    """Human readable end-of-run summary, one line per labelled series."""
+    lines = []
+    for metric in registry.collect():
+        if metric.type == 'histogram':
+            series = defaultdict(dict)
+            for sample in metric.samples:
+                labels = tuple(sorted(
+                    (k, v) for k, v in sample.labels.items() if k != 'le'
+                ))
+                if sample.name.endswith('_count'):
+                    series[labels]['count'] = sample.value
+                elif sample.name.endswith('_sum'):
+                    series[labels]['sum'] = sample.value
+            for labels, values in series.items():
+                count = values.get('count', 0)
+                if not count:
+                    continue
+                total = values.get('sum', 0)
+                lines.append(
+                    f'{metric.name}{_format_labels(labels)}: n={count:.0f} '
+                    f'total={total:.3f}s avg={total / count * 1000:.2f}ms'
+                )
+        elif metric.type in ('counter', 'gauge'):
+            for sample in metric.samples:
+                if sample.name.endswith('_created'):
+                    continue
+                labels = tuple(sorted(sample.labels.items()))
+                lines.append(f'{sample.name}{_format_labels(labels)}: {sample.value:g}')
+    return lines
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
@@ -1,11 +1,21 @@
 from db.session import AsyncSessionLocal
-from db.repositories import GithubStorage
-from api.github_client import AsyncGithubAPIClient
+from db.repositories import GithubStorage, chunked
+from db.writer import ConcurrentWriter
+from api.github_client import AsyncGithubAPIClient, SearchError
+from api.snapshot_batch import OwnerSnapshotBatch, RepositorySnapshotBatch
+from api.events import claim_spool, coalesce, read_events, repository_state
 from config import settings
 from aiolimiter import AsyncLimiter
+from profiling import NullProfiler, Profiler
+import metrics
 import asyncio
 import logging 
-from datetime import datetime
+import math
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
 import argparse
 
 logging.basicConfig(
@@ -18,6 +28,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger('pipeline')
 
+# replaced by a Profiler in main() when --profile is given
+profiler = NullProfiler()
+
+# snapshots written and fetches that failed in this run, stored on its snapshot_runs row
+run_counts = Counter()
+
 list_init_params = [
     {
         'name': 'python_mid_popular',
@@ -81,91 +97,234 @@ list_init_params = [
     }
 ]
 
-async def init(params):      
+@contextmanager
+def phase(name):
+    with metrics.phase(name), profiler.phase(name):
+        yield
+
+def make_writer():
+    return ConcurrentWriter(
+        AsyncSessionLocal,
+        batch_size=settings.BATCH_SIZE,
+        workers=settings.DB_WRITERS,
+        queue_size=settings.WRITE_QUEUE_SIZE,
+    )
+
+async def fetch_batches(fetch, items, batch_size):
+    # fetches one batch at a time so a full writer queue pauses fetching
+    for batch in chunked(list(items), batch_size):
+        results = await asyncio.gather(*(fetch(item) for item in batch))
+        with profiler.phase('model_dump'):
+            rows = [
+                r.model_dump(by_alias=False)
+                for r in results if r is not None
+            ]
+        run_counts['failures'] += len(batch) - len(rows)
+        yield rows
+
+async def fetch_snapshot_batches(fetch_into, items, make_batch, batch_size):
+    # like fetch_batches, but responses are appended straight into a compact batch
+    for chunk in chunked(list(items), batch_size):
+        batch = make_batch()
+        await asyncio.gather(*(fetch_into(item, batch) for item in chunk))
+        # a successful fetch appends exactly one row
+        run_counts['failures'] += len(chunk) - len(batch)
+        run_counts[batch.table] += len(batch)
+        yield batch
+
+def make_rate_limited():
     limiter = AsyncLimiter(
         max_rate=settings.MAX_RATE, 
         time_period=settings.TIME_PERIOD
     )
     async def safe(coro):
+        started = time.perf_counter()
         async with limiter:
+            metrics.LIMITER_WAIT.observe(time.perf_counter() - started)
             return await coro
+    return safe
+
+async def ingest(client, safe, repos_full_names, reason):
+    """Fetch owners and repositories of ``repos_full_names`` and start tracking them.
+
+    Returns the number of repositories tracked, fetches that failed are skipped.
+    """
+    owner_repo_pairs = [
+        tuple(full_name.split('/'))
+        for full_name in repos_full_names
+    ]
+    unique_owners = {owner for owner, _ in owner_repo_pairs}
+    logger.info(f'Unique owners to fetch: {len(unique_owners)}')
+
+    async with make_writer() as writer:
+        logger.info('Fetching and inserting owners...')
+        owners_count = 0
+        with phase('owners'):
+            async for owners_data in fetch_batches(
+                lambda owner: safe(client.fetch_owner(owner)),
+                unique_owners,
+                settings.BATCH_SIZE,
+            ):
+                owners_count += len(owners_data)
+                await writer.write('bulk_insert_owners', owners_data)
+            # repositories reference owners
+            await writer.flush()
+        logger.info(f'Owners fetched: {owners_count}')
+
+        logger.info('Fetching and inserting repositories...')
+        tracked = []
+        with phase('repositories'):
+            async for repos_data in fetch_batches(
+                lambda pair: safe(client.fetch_repository(*pair)),
+                owner_repo_pairs,
+                settings.BATCH_SIZE,
+            ):
+                for repo in repos_data:
+                    if 'repo_id' not in repo:
+                        logger.error(f"Missing repo_id: {repo}")
+                tracked.extend(
+                    {
+                        'repo_id': repo['repo_id'],
+                        'tracking_started_at': datetime.now(),
+                        'reason': reason,
+                    }
+                    for repo in repos_data
+                )
+                await writer.write('bulk_insert_repositories', repos_data)
+            # tracked repositories reference repositories
+            await writer.flush()
+        logger.info(f'Repositories fetched: {len(tracked)}')
+
+        logger.info('Inserting tracked...')
+        with phase('tracked'):
+            await writer.write('bulk_insert_tracked_repositories', tracked)
+            await writer.flush()
+    logger.info('Data committed successfully')
+    return len(tracked)
+
+async def init(params):      
+    safe = make_rate_limited()
 
     async with AsyncGithubAPIClient(settings.API_BASE_URL, settings.API_HEADERS) as client:
         logger.info(f'Searching repositories {params['name']}...')
-        repos_full_names = await client.search_repositories( 
-            query=params['query'], 
-            per_page=params['per_page'], 
-            max_pages=params['max_pages']
-        )
+        with phase('search'):
+            repos_full_names = await client.search_repositories( 
+                query=params['query'], 
+                per_page=params['per_page'], 
+                max_pages=params['max_pages'],
+                limit=safe,
+            )
         logger.info(f'Found {len(repos_full_names)} repositories')
 
-        owner_repo_pairs = [
-            tuple(full_name.split('/'))
-            for full_name in repos_full_names
-        ]
-        unique_owners = {owner for owner, _ in owner_repo_pairs}
-        logger.info(f'Unique owners to fetch: {len(unique_owners)}')
+        await ingest(client, safe, repos_full_names, params['name'])
 
-        logger.info('Fetching owners...')
-        owners = await asyncio.gather(
-            *(safe(client.fetch_owner(owner)) for owner in unique_owners)
-        )
-        logger.info('Fetching repositories...')
-        repos = await asyncio.gather(
-            *(safe(client.fetch_repository(owner, repo)) for owner, repo in owner_repo_pairs)
-        )
+# narrowed discovery searches are split down to this window before giving up
+MIN_SEARCH_WINDOW = timedelta(hours=1)
+
+def narrow_query(query: str, qualifier: str, since: datetime, until: datetime) -> str:
+    # the watermark is always later than the category's own created/pushed bound,
+    # so that bound is replaced; star bounds and language are kept
+    terms = [
+        term for term in query.split()
+        if not term.startswith(f'{qualifier}:')
+    ]
+    terms.append(f'{qualifier}:{since:%Y-%m-%dT%H:%M:%SZ}..{until:%Y-%m-%dT%H:%M:%SZ}')
+    return ' '.join(terms)
+
+async def search_window(client, safe, query: str, qualifier: str, since: datetime, until: datetime) -> tuple:
+    """Search ``since``..``until``, halving the range while it has more matches than GitHub lists.
 
-        owners_data = [
-            o.model_dump(by_alias=False)
-            for o in owners if o is not None
-        ]
-        repos_data = [
-            r.model_dump(by_alias=False)
-            for r in repos if r is not None
-        ]
-
-        for repo in repos_data:
-            if 'repo_id' not in repo:
-                logger.error(f"Missing repo_id: {repo}")
-        tracked = [
-            {
-                'repo_id': repo['repo_id'],
-                'tracking_started_at': datetime.now(),
-                'reason': params['name'],
-            }
-            for repo in repos_data
-        ]       
-
-        logger.info(f'Owners fetched: {len(owners_data)}')
-        logger.info(f'Repositories fetched: {len(repos_data)}')
+    Returns the repositories found and whether the whole range was covered.
+    A failed search raises SearchError instead of being split further.
+    """
+    found = await client.search_all_repositories(narrow_query(query, qualifier, since, until), limit=safe)
+    if found is not None:
+        return found, True
+    if until - since <= MIN_SEARCH_WINDOW:
+        logger.warning(f'Cannot list all {qualifier} {since:%Y-%m-%d %H:%M}..{until:%H:%M} results of {query}')
+        return [], False
+    middle = since + (until - since) / 2
+    earlier, earlier_complete = await search_window(client, safe, query, qualifier, since, middle)
+    later, later_complete = await search_window(client, safe, query, qualifier, middle, until)
+    return earlier + later, earlier_complete and later_complete
+
+async def discover(params):
+    safe = make_rate_limited()
+    category = params['name']
+    started_at = datetime.now(timezone.utc)
+
+    async with AsyncSessionLocal() as session:
+        storage = GithubStorage(session, settings.BATCH_SIZE)
+        watermark = await storage.get_discovery_watermark(category)
+
+    async with AsyncGithubAPIClient(settings.API_BASE_URL, settings.API_HEADERS) as client:
+        with phase('search'):
+            if watermark is None:
+                # like --init, the category is its top max_pages by stars
+                logger.info(f'No watermark for {category}, running the full search')
+                try:
+                    found = await client.search_repositories(
+                        query=params['query'],
+                        per_page=params['per_page'],
+                        max_pages=params['max_pages'],
+                        limit=safe,
+                        strict=True,
+                    )
+                    complete = True
+                except SearchError as e:
+                    logger.warning(f'Search of {category} failed: {e}')
+                    found, complete = [], False
+            else:
+                logger.info(f'Discovering {category} since {watermark:%Y-%m-%d %H:%M}...')
+                # new repositories, and older ones that have become active and may now qualify
+                found, complete = [], True
+                for qualifier in ('created', 'pushed'):
+                    try:
+                        repos, covered = await search_window(
+                            client, safe, params['query'], qualifier, watermark, started_at
+                        )
+                    except SearchError as e:
+                        # a failing search is not retried on narrower ranges, it would fail there too
+                        logger.warning(f'Search of {category} by {qualifier} failed: {e}')
+                        repos, covered = [], False
+                    found.extend(repos)
+                    complete = complete and covered
+        found = list(dict.fromkeys(found))
 
         async with AsyncSessionLocal() as session:
             storage = GithubStorage(session, settings.BATCH_SIZE)
-            try:
-                if owners_data:
-                    logger.info('Bulk inserting owners...')
-                    await storage.bulk_insert_owners(owners_data)
-                if repos_data:
-                    logger.info('Bulk inserting repositories...')
-                    await storage.bulk_insert_repositories(repos_data)
-                if tracked:
-                    logger.info('Bulk inserting tracked...')
-                    await storage.bulk_insert_tracked_repositories(tracked)
-                await storage.commit()
-                logger.info('Data committed successfully')
-            except Exception as e:
-                await storage.rollback()
-                logger.error(f'Error during DB: {e}')
-                raise
-
-async def update():
-    limiter = AsyncLimiter(
-        max_rate=settings.MAX_RATE, 
-        time_period=settings.TIME_PERIOD
-    )
-    async def safe(coro):
-        async with limiter:
-            return await coro
+            tracked = await storage.get_tracked_full_names(found)
+        new_full_names = [name for name in found if name not in tracked]
+        logger.info(f'Found {len(found)} repositories, {len(new_full_names)} not tracked yet')
+
+        if new_full_names:
+            ingested = await ingest(client, safe, new_full_names, category)
+            if ingested < len(new_full_names):
+                logger.warning(f'Fetched {ingested}/{len(new_full_names)} new repositories of {category}')
+                complete = False
+
+    # the next discovery starts where everything found has been committed; otherwise
+    # it repeats this range, already tracked repositories are skipped then
+    if not complete:
+        logger.warning(f'Watermark of {category} kept, the range is searched again next time')
+        return
+    async with AsyncSessionLocal() as session:
+        storage = GithubStorage(session, settings.BATCH_SIZE)
+        await storage.set_discovery_watermark(category, started_at)
+        await storage.commit()
+
+async def poll_repository_snapshots(client, safe, writer, full_names, collected_at, run_id):
+    owner_repo_pairs = [tuple(full_name.split('/')) for full_name in full_names]
+    async for batch in fetch_snapshot_batches(
+        lambda pair, batch: safe(client.fetch_repository_snapshot_into(*pair, batch)),
+        owner_repo_pairs,
+        lambda: RepositorySnapshotBatch(collected_at, run_id),
+        settings.BATCH_SIZE,
+    ):
+        await writer.write_batch('copy_snapshots', batch)
+
+async def update(run_id: int):
+    safe = make_rate_limited()
 
     async with AsyncSessionLocal() as session:
         storage = GithubStorage(session, settings.BATCH_SIZE)
@@ -182,38 +341,170 @@ async def update():
             logger.error(f'Error during DB: {e}')
             raise
         
+    # one timestamp for the whole run, stored once per batch instead of once per row
+    collected_at = datetime.now(timezone.utc)
+
     async with AsyncGithubAPIClient(settings.API_BASE_URL, settings.API_HEADERS) as client:
-        logger.info('Fetching owners snapshots...')
-        owners = await asyncio.gather(
-            *(safe(client.fetch_owner_snapshot(owner)) for owner in unique_owners)
+        # snapshot tables only reference existing owners and repositories,
+        # so both can be written without flushing in between
+        async with make_writer() as writer:
+            logger.info('Fetching and inserting owners snapshots...')
+            with phase('owners_snapshots'):
+                async for batch in fetch_snapshot_batches(
+                    lambda owner, batch: safe(client.fetch_owner_snapshot_into(owner, batch)),
+                    unique_owners,
+                    lambda: OwnerSnapshotBatch(collected_at, run_id),
+                    settings.BATCH_SIZE,
+                ):
+                    await writer.write_batch('copy_snapshots', batch)
+
+            logger.info('Fetching and inserting repositories snapshots...')
+            with phase('repositories_snapshots'):
+                await poll_repository_snapshots(client, safe, writer, full_names, collected_at, run_id)
+                await writer.flush()
+        logger.info('Data committed successfully')
+
+async def apply_events(writer, repositories: dict, collected_at: datetime, run_id: int) -> int:
+    """Write coalesced event repositories in micro-batches, returns snapshots written."""
+    applied = 0
+    for chunk in chunked(list(repositories.items()), settings.EVENTS_BATCH_SIZE):
+        async with AsyncSessionLocal() as session:
+            storage = GithubStorage(session, settings.BATCH_SIZE)
+            # events carry no subscribers_count, and untracked repositories are skipped
+            subscribers = await storage.get_latest_subscribers([repo_id for repo_id, _ in chunk])
+
+        batch = RepositorySnapshotBatch(collected_at, run_id)
+        states = []
+        for repo_id, repository in chunk:
+            if repo_id not in subscribers:
+                continue
+            try:
+                batch.append({**repository, 'subscribers_count': subscribers[repo_id]})
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f'Unusable event payload for repo {repo_id}: {e}')
+                run_counts['failures'] += 1
+                continue
+            state = repository_state(repository)
+            if state is not None:
+                states.append(state)
+
+        await writer.write('update_repository_state', states)
+        await writer.write_batch('copy_snapshots', batch)
+        metrics.EVENTS_APPLIED.inc(len(batch))
+        run_counts[batch.table] += len(batch)
+        applied += len(batch)
+    return applied
+
+async def events(path: str, run_id: int) -> list:
+    """Apply the claimed spool files; returns them for main() to drop once the run succeeded."""
+    safe = make_rate_limited()
+    started_at = datetime.now(timezone.utc)
+
+    async with make_writer() as writer:
+        with phase('events'):
+            claimed = claim_spool(path)
+            # coalesced over the whole spool: one snapshot per repository and run,
+            # so run-over-run diffs join exactly one row per side
+            repositories = coalesce(chain.from_iterable(read_events(spool) for spool in claimed))
+            applied = await apply_events(writer, repositories, datetime.now(timezone.utc), run_id)
+            await writer.flush()
+    logger.info(f'Snapshots from events: {applied}')
+
+    # repositories without events (or with unusable ones) are still polled, just less often
+    async with AsyncSessionLocal() as session:
+        storage = GithubStorage(session, settings.BATCH_SIZE)
+        stale = await storage.get_stale_tracked_full_names(
+            started_at - timedelta(hours=settings.RECONCILE_AFTER_HOURS), run_id
         )
-        logger.info('Fetching repositories snapshots...')
-        repos = await asyncio.gather(
-            *(safe(client.fetch_repository_snapshot(owner, repo)) for owner, repo in owner_repo_pairs)
+    logger.info(f'Reconciling {len(stale)} repositories over REST...')
+    if stale:
+        async with AsyncGithubAPIClient(settings.API_BASE_URL, settings.API_HEADERS) as client:
+            async with make_writer() as writer:
+                with phase('reconcile'):
+                    await poll_repository_snapshots(
+                        client, safe, writer, stale, datetime.now(timezone.utc), run_id
+                    )
+                    await writer.flush()
+    logger.info('Data committed successfully')
+    return claimed
+
+STARGAZERS_PER_PAGE = 100
+# GitHub stops paginating stargazers after 400 pages (40k stars)
+STARGAZERS_MAX_PAGES = 400
+
+def cumulative_daily_stars(repo_id: int, stars_per_day: Counter, until: date) -> list:
+    """One row per day from the first star up to (not including) ``until``."""
+    if not stars_per_day:
+        return []
+    rows = []
+    total = 0
+    day = min(stars_per_day)
+    while day < until:
+        total += stars_per_day.get(day, 0)
+        rows.append({'repo_id': repo_id, 'day': day, 'stars': total})
+        day += timedelta(days=1)
+    return rows
+
+async def backfill_repository(client, safe, writer, repo) -> dict:
+    owner, name = repo['full_name'].split('/')
+    pages = min(math.ceil(repo['stars'] / STARGAZERS_PER_PAGE), STARGAZERS_MAX_PAGES)
+    is_truncated = repo['stars'] > STARGAZERS_PER_PAGE * STARGAZERS_MAX_PAGES
+
+    # page count is known from the star count, so all pages are requested at once
+    # and folded into per-day counts as they arrive
+    stars_per_day = Counter()
+    failed = False
+    for pending in asyncio.as_completed([
+        safe(client.fetch_stargazer_dates(owner, name, page, STARGAZERS_PER_PAGE))
+        for page in range(1, pages + 1)
+    ]):
+        starred = await pending
+        if starred is None:
+            failed = True
+            continue
+        stars_per_day.update(
+            datetime.fromisoformat(starred_at).date() for starred_at in starred
         )
+    if failed:
+        logger.warning(f'Incomplete stargazers for {repo["full_name"]}, retried next run')
+        return None
 
-    owners_snapshots = [
-        o.model_dump(by_alias=False)
-        for o in owners if o is not None
-    ]
-    repos_snapshots = [
-        r.model_dump(by_alias=False)
-        for r in repos if r is not None
-    ]
+    until = repo['tracking_started_at'].astimezone(timezone.utc).date()
+    if is_truncated and stars_per_day:
+        # after the last listed star the counts would be wrong, the last day may be partial
+        until = min(until, max(stars_per_day))
+    rows = cumulative_daily_stars(repo['repo_id'], stars_per_day, until)
+    await writer.write('bulk_insert_stargazer_history', rows)
+    return {
+        'repo_id': repo['repo_id'],
+        'completed_at': datetime.now(timezone.utc),
+        'stars': repo['stars'],
+        'is_truncated': is_truncated,
+    }
+
+async def backfill():
+    safe = make_rate_limited()
 
     async with AsyncSessionLocal() as session:
         storage = GithubStorage(session, settings.BATCH_SIZE)
-        try:
-            logger.info('Bulk inserting owners snapshots...')
-            await storage.bulk_insert_owner_snapshots(owners_snapshots)
-            logger.info('Bulk inserting repositories snapshots...')
-            await storage.bulk_insert_repository_snapshots(repos_snapshots)
-            await storage.commit()
-            logger.info('Data committed successfully')
-        except Exception as e:
-            await storage.rollback()
-            logger.error(f'Error during DB: {e}')
-            raise
+        candidates = await storage.get_stargazer_backfill_candidates()
+    logger.info(f'Repositories to backfill: {len(candidates)}')
+
+    async with AsyncGithubAPIClient(settings.API_BASE_URL, settings.API_HEADERS) as client:
+        async with make_writer() as writer:
+            with phase('stargazers'):
+                for repos in chunked(candidates, settings.BACKFILL_CONCURRENCY):
+                    completed = await asyncio.gather(
+                        *(backfill_repository(client, safe, writer, repo) for repo in repos)
+                    )
+                    run_counts['failures'] += completed.count(None)
+                    completed = [c for c in completed if c is not None]
+                    # a repository is marked done only after its history is committed
+                    await writer.flush()
+                    await writer.write('bulk_insert_stargazer_backfills', completed)
+                    await writer.flush()
+                    logger.info(f'Backfilled {len(completed)}/{len(repos)} repositories')
+    logger.info('Data committed successfully')
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -231,17 +522,116 @@ def parse_args():
         action='store_true',
         help='Update snapshots for tracked repositories, and owners'
     )
+    group.add_argument(
+        '--backfill',
+        action='store_true',
+        help='Backfill daily star history of tracked repositories from stargazer timestamps'
+    )
+    group.add_argument(
+        '--events',
+        nargs='?',
+        const=settings.EVENTS_FILE,
+        metavar='SPOOL',
+        help='Apply webhook events from the spool file (default EVENTS_FILE), '
+             'then poll tracked repositories that had no snapshot for RECONCILE_AFTER_HOURS'
+    )
+    group.add_argument(
+        '--discover',
+        action='store_true',
+        help='Track repositories that started qualifying for a category since the last discovery'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='basic',
+        choices=['basic', 'memory', 'cprofile'],
+        help='Write per-phase wall/CPU/wait time to --profile-dir; "memory" also traces '
+             'peak memory per phase with tracemalloc, "cprofile" profiles the event loop with cProfile'
+    )
+    parser.add_argument(
+        '--profile-dir',
+        default='profiles',
+        help='Directory for profiling reports (default: profiles)'
+    )
 
     return parser.parse_args()
 
+async def start_run(mode: str) -> int:
+    async with AsyncSessionLocal() as session:
+        storage = GithubStorage(session, settings.BATCH_SIZE)
+        run_id = await storage.start_snapshot_run(mode, datetime.now(timezone.utc))
+        await storage.commit()
+    return run_id
+
+async def finish_run(run_id: int, status: str):
+    async with AsyncSessionLocal() as session:
+        storage = GithubStorage(session, settings.BATCH_SIZE)
+        await storage.finish_snapshot_run(
+            run_id,
+            status,
+            datetime.now(timezone.utc),
+            repository_snapshots=run_counts[RepositorySnapshotBatch.table],
+            owner_snapshots=run_counts[OwnerSnapshotBatch.table],
+            failures=run_counts['failures'],
+        )
+        if status == 'succeeded' and run_counts[RepositorySnapshotBatch.table] + run_counts[OwnerSnapshotBatch.table]:
+            # snapshots become visible with this commit, so the read API drops its cache now
+            await storage.notify_snapshots_committed(str(run_id))
+        await storage.commit()
+
 async def main():
+    global profiler
     args = parse_args()
+    mode = next(mode for mode in ('init', 'update', 'discover', 'backfill', 'events') if getattr(args, mode))
+
+    if args.profile:
+        profiler = Profiler(
+            args.profile_dir,
+            mode=mode,
+            use_cprofile=args.profile == 'cprofile',
+            trace_memory=args.profile == 'memory',
+        )
+        profiler.start()
+
+    if settings.METRICS_PORT:
+        metrics.serve(settings.METRICS_PORT)
 
-    if args.init:
-        for params in list_init_params:
-            await init(params)
-    elif args.update:
-        await update()
+    run_id = await start_run(mode)
+    logger.info(f'Run {run_id} ({mode}) started')
+    status = 'failed'
+    claimed = []
+    try:
+        with phase('run'):
+            if args.init:
+                for params in list_init_params:
+                    await init(params)
+            elif args.update:
+                await update(run_id)
+            elif args.discover:
+                for params in list_init_params:
+                    await discover(params)
+            elif args.backfill:
+                await backfill()
+            elif args.events:
+                claimed = await events(args.events, run_id)
+        status = 'succeeded'
+    finally:
+        await finish_run(run_id, status)
+        logger.info(f'Run {run_id} {status}')
+        if status == 'succeeded':
+            # claimed spool files go only once their snapshots are published;
+            # after a failed run the next --events claims and applies them again
+            for spool in claimed:
+                spool.unlink()
+                logger.info(f'Applied {spool.name}')
+        if settings.METRICS_FILE:
+            metrics.export(settings.METRICS_FILE)
+        summary = metrics.summary()
+        logger.info('Run summary:')
+        for line in summary:
+            logger.info(f'  {line}')
+        profiler.stop(extra_lines=['metrics:', *summary])
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,127 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+logger = logging.getLogger('pipeline.profiling')
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullProfiler:
+    """Used when --profile is not given: every hook is a no-op."""
+
+    def phase(self, name: str):
+        return _NULL_CONTEXT
+
+    def start(self):
+        pass
+
+    def stop(self, extra_lines=()):
+        pass
+
+
+class Profiler:
+    """Wall time, CPU time and, with ``trace_memory``, peak traced memory per phase of a run.
+
+    Wall minus CPU time of a phase is the time its tasks spent awaiting
+    (HTTP responses, the rate limiter, the database). tracemalloc slows every
+    allocation down, so it only runs with ``trace_memory`` and the timings of
+    such runs are not comparable to plain ones. With ``use_cprofile``
+    the whole event loop also runs under cProfile and the stats are saved
+    as ``run.pstats``, which snakeviz, gprof2dot or flameprof turn into
+    call graphs and flamegraphs.
+    """
+
+    def __init__(self, output_dir: str, mode: str, use_cprofile: bool = False,
+                 trace_memory: bool = False):
+        self.output_dir = os.path.join(
+            output_dir, f'{mode}-{datetime.now():%Y%m%d-%H%M%S}'
+        )
+        self.use_cprofile = use_cprofile
+        self.trace_memory = trace_memory
+        self.stats = defaultdict(lambda: {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak': 0})
+        self._profile = None
+        self._peaks = []
+        self._started = None
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = (time.perf_counter(), time.process_time())
+        if self.use_cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _fold_peak(self):
+        if not self.trace_memory:
+            return
+        # tracemalloc keeps a single peak, so fold it into every open phase before resetting
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peaks = [max(p, peak) for p in self._peaks]
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def phase(self, name: str):
+        self._fold_peak()
+        self._peaks.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._fold_peak()
+            entry = self.stats[name]
+            entry['calls'] += 1
+            entry['wall'] += time.perf_counter() - wall
+            entry['cpu'] += time.process_time() - cpu
+            entry['peak'] = max(entry['peak'], self._peaks.pop())
+
+    def stop(self, extra_lines=()):
+        if self._profile is not None:
+            self._profile.disable()
+        snapshot = None
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        wall = time.perf_counter() - self._started[0]
+        cpu = time.process_time() - self._started[1]
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        header = f'{"phase":<24}{"calls":>7}{"wall s":>10}{"cpu s":>10}{"wait s":>10}'
+        lines = [
+            f'run: wall={wall:.2f}s cpu={cpu:.2f}s wait={max(wall - cpu, 0):.2f}s',
+            '',
+            header + (f'{"peak MiB":>10}' if self.trace_memory else ''),
+        ]
+        for name, entry in self.stats.items():
+            line = (
+                f'{name:<24}{entry["calls"]:>7}{entry["wall"]:>10.2f}{entry["cpu"]:>10.2f}'
+                f'{max(entry["wall"] - entry["cpu"], 0):>10.2f}'
+            )
+            if self.trace_memory:
+                line += f'{entry["peak"] / 2 ** 20:>10.1f}'
+            lines.append(line)
+
+        if snapshot is not None:
+            lines += ['', 'top allocations at the end of the run:']
+            lines += [f'  {stat}' for stat in snapshot.statistics('lineno')[:15]]
+
+        if extra_lines:
+            lines += ['', *extra_lines]
+
+        if self._profile is not None:
+            self._profile.dump_stats(os.path.join(self.output_dir, 'run.pstats'))
+            stream = io.StringIO()
+            pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(30)
+            lines += ['', stream.getvalue()]
+
+        with open(os.path.join(self.output_dir, 'report.txt'), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        logger.info(f'Profile written to {self.output_dir}')
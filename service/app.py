@@ -0,0 +1,155 @@
+"""Read-only HTTP API over the analytical queries for the dashboard and notebooks.
+
+    uvicorn service.app:app --port 8000
+
+Results are cached in process for API_CACHE_TTL seconds and dropped as soon
+as the pipeline announces new snapshots (NOTIFY on SNAPSHOTS_CHANNEL), so
+repeated dashboard refreshes never re-scan the snapshot tables.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import asyncpg
+from async_lru import alru_cache
+from fastapi import FastAPI, Query
+from sqlalchemy import text
+
+from config import settings
+from db.queries import AnalyticsStorage
+from db.repositories import SNAPSHOTS_CHANNEL
+from db.session import AsyncSessionLocal, engine
+
+logger = logging.getLogger('service')
+
+cached_queries = []
+
+
+def cached(fn):
+    wrapped = alru_cache(maxsize=settings.API_CACHE_SIZE, ttl=settings.API_CACHE_TTL)(fn)
+    cached_queries.append(wrapped)
+    return wrapped
+
+
+def clear_cache(*_):
+    for query in cached_queries:
+        query.cache_clear()
+    logger.info('Snapshots committed, result cache cleared')
+
+
+async def run_query(method: str, **params):
+    async with AsyncSessionLocal() as session:
+        await session.execute(text('SET TRANSACTION READ ONLY'))
+        return await getattr(AnalyticsStorage(session), method)(**params)
+
+
+@cached
+async def top_growers_by_language(days: int, limit: int):
+    return await run_query('top_growers_by_language', days=days, limit=limit)
+
+
+@cached
+async def weekly_star_deltas(days: int):
+    return await run_query('weekly_star_deltas', days=days)
+
+
+@cached
+async def category_time_series(category: str, days: int):
+    return await run_query('category_time_series', category=category, days=days)
+
+
+@cached
+async def owner_type_breakdown():
+    return await run_query('owner_type_breakdown')
+
+
+@cached
+async def top_owners_by_followers_growth(days: int, limit: int):
+    return await run_query('top_owners_by_followers_growth', days=days, limit=limit)
+
+
+@cached
+async def recent_runs(limit: int):
+    # not cleared by a run that is still in progress, hence the TTL
+    return await run_query('recent_runs', limit=limit)
+
+
+@cached
+async def repository_run_deltas(run_id: int, previous_run_id: Optional[int], limit: int):
+    return await run_query(
+        'repository_run_deltas', run_id=run_id, previous_run_id=previous_run_id, limit=limit
+    )
+
+
+@cached
+async def owner_run_deltas(run_id: int, previous_run_id: Optional[int], limit: int):
+    return await run_query(
+        'owner_run_deltas', run_id=run_id, previous_run_id=previous_run_id, limit=limit
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = await asyncpg.connect(settings.DB_DSN)
+    await listener.add_listener(SNAPSHOTS_CHANNEL, clear_cache)
+    try:
+        yield
+    finally:
+        await listener.close()
+        await engine.dispose()
+
+
+app = FastAPI(title='GitHub repository analytics', lifespan=lifespan)
+
+
+@app.get('/health')
+async def health():
+    return {'status': 'ok'}
+
+
+@app.get('/repositories/top-growers')
+async def get_top_growers(days: int = Query(30, ge=1, le=3650), limit: int = Query(10, ge=1, le=100)):
+    return await top_growers_by_language(days, limit)
+
+
+@app.get('/categories/weekly-deltas')
+async def get_weekly_deltas(days: int = Query(90, ge=7, le=3650)):
+    return await weekly_star_deltas(days)
+
+
+@app.get('/categories/{category}/time-series')
+async def get_category_time_series(category: str, days: int = Query(90, ge=1, le=3650)):
+    return await category_time_series(category, days)
+
+
+@app.get('/owners/types')
+async def get_owner_types():
+    return await owner_type_breakdown()
+
+
+@app.get('/owners/top-growers')
+async def get_top_owners(days: int = Query(30, ge=1, le=3650), limit: int = Query(50, ge=1, le=500)):
+    return await top_owners_by_followers_growth(days, limit)
+
+
+@app.get('/runs')
+async def get_runs(limit: int = Query(20, ge=1, le=500)):
+    return await recent_runs(limit)
+
+
+@app.get('/runs/{run_id}/repository-deltas')
+async def get_repository_run_deltas(run_id: int, previous: Optional[int] = None,
+                                    limit: int = Query(100, ge=1, le=1000)):
+    return await repository_run_deltas(run_id, previous, limit)
+
+
+@app.get('/runs/{run_id}/owner-deltas')
+async def get_owner_run_deltas(run_id: int, previous: Optional[int] = None,
+                               limit: int = Query(100, ge=1, le=1000)):
+    return await owner_run_deltas(run_id, previous, limit)
@@ -0,0 +1,60 @@
+"""GitHub webhook receiver feeding `python pipeline.py --events`.
+
+    uvicorn service.webhook:app --port 8001
+
+Deliveries signed with WEBHOOK_SECRET are appended to the EVENTS_FILE spool
+as one JSON line each and nothing else; the pipeline applies them in
+micro-batches, so the receiver answers GitHub well within its 10s limit.
+Kept apart from service/app.py because this one has to be reachable from
+GitHub while the read API stays internal.
+"""
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import asyncio
+import hashlib
+import hmac
+import logging
+
+from fastapi import FastAPI, Header, HTTPException, Request
+
+from api.events import EVENT_TYPES, append_to_spool, spool_line
+from config import settings
+
+logger = logging.getLogger('service.webhook')
+
+app = FastAPI(title='GitHub webhook receiver')
+
+
+def verify_signature(body: bytes, signature: str):
+    if not settings.WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail='WEBHOOK_SECRET is not configured')
+    expected = 'sha256=' + hmac.new(
+        settings.WEBHOOK_SECRET.encode(), body, hashlib.sha256
+    ).hexdigest()
+    if not signature or not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=401, detail='Invalid signature')
+
+
+@app.get('/health')
+async def health():
+    return {'status': 'ok'}
+
+
+@app.post('/webhook', status_code=202)
+async def receive(
+    request: Request,
+    x_github_event: str = Header(...),
+    x_hub_signature_256: str = Header(None),
+):
+    body = await request.body()
+    verify_signature(body, x_hub_signature_256)
+    if x_github_event not in EVENT_TYPES:
+        return {'status': 'ignored'}
+    line = spool_line(x_github_event, await request.json())
+    # flock shared with the pipeline, which may be claiming the spool right now
+    await asyncio.to_thread(append_to_spool, settings.EVENTS_FILE, line)
+    return {'status': 'queued'}